@@ -3,29 +3,45 @@ RAG Agent
 LangGraph agent setup for RAG processing with tool support.
 """
 import asyncio
-from typing import TypedDict, Annotated, Sequence
+import logging
+from functools import lru_cache
+from typing import Dict, Tuple, TypedDict, Annotated, Sequence
+import orjson
 from operator import add as add_messages
 from langchain_core.messages import BaseMessage, SystemMessage, ToolMessage
 from langgraph.graph import StateGraph, END
 from langchain_openai import AzureChatOpenAI
 from app.config.settings import CHAT_MODEL, AZURE_OPENAI_API_VERSION, SYSTEM_PROMPT_PATH
 from app.utils.prompt_loader import load_prompt
+from app.utils.http_clients import shared_async_http_client
 from app.tools.handbook_tool import handbook_retriever_tool
 from app.tools.employee_tool import employee_data_sql_tool
 
-# Load system prompt
-system_prompt = load_prompt(SYSTEM_PROMPT_PATH)
+logger = logging.getLogger(__name__)
 
-# Initialize LLM
-llm = AzureChatOpenAI(
-    model=CHAT_MODEL,
-    api_version=AZURE_OPENAI_API_VERSION,
-)
+# Load system prompt once; the message is immutable, so reuse it every turn.
+# Keeping it as the identical first message also lets Azure OpenAI's automatic
+# prompt caching reuse the prefix across turns and sessions.
+system_prompt = load_prompt(SYSTEM_PROMPT_PATH)
+SYSTEM_MSG = SystemMessage(content=system_prompt)
 
-# Bind tools to LLM
+# Tools available to the agent
 tools = [handbook_retriever_tool, employee_data_sql_tool]
 tools_dict = {t.name: t for t in tools}
-llm = llm.bind_tools(tools)
+
+
+@lru_cache(maxsize=1)
+def get_llm():
+    """Build the tool-bound LLM once and reuse it (on the shared HTTP/2 connection pool)."""
+    llm = AzureChatOpenAI(
+        model=CHAT_MODEL,
+        api_version=AZURE_OPENAI_API_VERSION,
+        http_async_client=shared_async_http_client,
+    )
+    return llm.bind_tools(tools)
+
+
+llm = get_llm()
 
 
 # LangGraph Agent State
@@ -36,84 +52,56 @@ class AgentState(TypedDict):
 def should_continue(state: AgentState):
     """Check if the last message contains tool calls."""
     result = state["messages"][-1]
-    return hasattr(result, "tool_calls") and len(result.tool_calls) > 0
+    return bool(getattr(result, "tool_calls", None))
 
 
 async def call_llm(state: AgentState) -> AgentState:
     """Async function to call the LLM with the current state."""
-    messages = list(state['messages'])
-    messages = [SystemMessage(content=system_prompt)] + messages
-    message = await llm.ainvoke(messages)
+    message = await llm.ainvoke([SYSTEM_MSG, *state['messages']])
     return {"messages": [message]}
 
 
-async def _execute_single_tool(tool_call: dict) -> tuple:
-    """Execute a single tool call asynchronously. Returns (tool_call_id, tool_name, result)."""
-    tool_name = tool_call['name']
-    tool_call_id = tool_call['id']
-    args = tool_call.get('args', {})
-    
-    # Get the appropriate argument for logging
-    if 'query' in args:
-        arg_value = args['query']
-        print(f"Calling Tool: {tool_name} with query: {arg_value}")
-    elif 'sql_query' in args:
-        arg_value = args['sql_query']
-        print(f"Calling Tool: {tool_name} with SQL: {arg_value}")
-    else:
-        arg_value = str(args)
-        print(f"Calling Tool: {tool_name} with args: {arg_value}")
+async def _execute_single_tool(tool_name: str, args: dict) -> str:
+    """Execute a single tool call asynchronously and return its result as text."""
+    logger.debug("Calling Tool: %s with args: %s", tool_name, args)
 
     if tool_name not in tools_dict:
-        print(f"\nTool: {tool_name} does not exist.")
-        result = "Incorrect Tool Name, Please Retry and Select tool from List of Available tools."
-    else:
-        tool = tools_dict[tool_name]
-        
-        # For blocking operations like SQLite, use asyncio.to_thread
-        # For LangChain tools that support async, use ainvoke
-        if tool_name == "employee_data_sql_tool":
-            # Run blocking SQLite operation in a thread pool
-            result = await asyncio.to_thread(tool.invoke, args)
-        else:
-            # Try async invoke first, fallback to sync in thread if needed
-            try:
-                result = await tool.ainvoke(args)
-            except AttributeError:
-                # Fallback to synchronous invoke in thread if ainvoke not available
-                result = await asyncio.to_thread(tool.invoke, args)
-    
-    return (tool_call_id, tool_name, str(result))
+        logger.warning("Tool: %s does not exist.", tool_name)
+        return "Incorrect Tool Name, Please Retry and Select tool from List of Available tools."
+
+    # All tools are async (aiosqlite for SQL, async retriever for the handbook),
+    # so nothing blocks the event loop here
+    result = await tools_dict[tool_name].ainvoke(args)
+    return str(result)
 
 
 async def take_action(state: AgentState) -> AgentState:
     """Execute tool calls from the LLM's response in parallel using asyncio."""
     tool_calls = state["messages"][-1].tool_calls
-    results = []
     
-    # Execute tools in parallel using asyncio.gather
-    if len(tool_calls) > 1:
-        print(f"[PARALLEL] Executing {len(tool_calls)} tools concurrently with asyncio...")
-        # Execute all tools in parallel - asyncio.gather maintains order
-        tool_results = await asyncio.gather(*[
-            _execute_single_tool(t) for t in tool_calls
-        ])
-        
-        # Build results in original order (asyncio.gather maintains order)
-        for tool_call_id, tool_name, result in tool_results:
-            results.append(ToolMessage(
-                tool_call_id=tool_call_id,
-                name=tool_name,
-                content=result
-            ))
-    else:
+    if len(tool_calls) == 1:
         # Single tool call - execute directly
-        tool_call_id, tool_name, result = await _execute_single_tool(tool_calls[0])
-        results.append(ToolMessage(
-            tool_call_id=tool_call_id,
-            name=tool_name,
-            content=result
-        ))
+        call = tool_calls[0]
+        result = await _execute_single_tool(call['name'], call.get('args', {}))
+        return {"messages": [ToolMessage(tool_call_id=call['id'], name=call['name'], content=result)]}
+    
+    # Execute tools in parallel using a TaskGroup (cancels siblings on failure).
+    # Identical calls (same tool and args, e.g. a repeated handbook search) share one task.
+    logger.debug("[PARALLEL] Executing %d tools concurrently with asyncio...", len(tool_calls))
+    inflight: Dict[Tuple[str, bytes], asyncio.Task] = {}
+    call_keys = []
+    async with asyncio.TaskGroup() as tg:
+        for call in tool_calls:
+            args = call.get('args', {})
+            key = (call['name'], orjson.dumps(args, option=orjson.OPT_SORT_KEYS))
+            if key not in inflight:
+                inflight[key] = tg.create_task(_execute_single_tool(call['name'], args))
+            call_keys.append(key)
+    
+    # Build results in original tool-call order, each answering its own tool_call_id
+    results = [None] * len(tool_calls)
+    for i, (call, key) in enumerate(zip(tool_calls, call_keys)):
+        results[i] = ToolMessage(tool_call_id=call['id'], name=call['name'], content=inflight[key].result())
     
     return {"messages": results}
 
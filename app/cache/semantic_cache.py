@@ -0,0 +1,156 @@
+"""
+Semantic Cache
+In-memory answer cache keyed by query embedding.
+Candidates are found with random-projection LSH buckets and confirmed with cosine similarity.
+Stored vectors are int8-quantized (per-vector scale), a quarter of the float32 footprint.
+"""
+import copy
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from app.config.settings import (
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL_SECONDS,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+)
+
+
+def _quantize(v: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Symmetric int8 quantization of a unit vector: v ~= q * scale."""
+    peak = float(np.abs(v).max())
+    scale = peak / 127 if peak else 1.0
+    return np.rint(v / scale).astype(np.int8), scale
+
+
+@dataclass
+class _Entry:
+    vector: np.ndarray  # unit-normalized, int8-quantized
+    scale: float  # dequantization factor for `vector`
+    scope: str
+    response: Dict[str, Any]
+    created_at: float
+    keys: Tuple[int, ...]
+
+
+class SemanticCache:
+    """
+    LSH-indexed semantic cache.
+
+    Each of `num_tables` tables hashes a vector to `num_bits` sign bits of random
+    projections; near-duplicate queries land in the same bucket in at least one
+    table. Entries expire after `ttl_seconds` and are evicted LRU beyond `max_entries`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        ttl_seconds: float = 3600,
+        max_entries: int = 10000,
+        num_tables: int = 8,
+        num_bits: int = 16,
+        seed: int = 0,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._num_tables = num_tables
+        self._num_bits = num_bits
+        self._rng = np.random.default_rng(seed)
+        self._planes: Optional[np.ndarray] = None  # (num_tables * num_bits, dim), built on first use
+        self._bit_weights = 1 << np.arange(num_bits, dtype=np.int64)
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in range(num_tables)]
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._next_id = 0
+
+    def _normalize(self, vector: Sequence[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def _keys(self, v: np.ndarray) -> Tuple[int, ...]:
+        if self._planes is None:
+            self._planes = self._rng.standard_normal(
+                (self._num_tables * self._num_bits, v.shape[0])
+            ).astype(np.float32)
+        bits = (self._planes @ v > 0).reshape(self._num_tables, self._num_bits)
+        return tuple(int(k) for k in bits @ self._bit_weights)
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for table, key in zip(self._tables, entry.keys):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del table[key]
+
+    def lookup(self, vector: Sequence[float], scope: str = "") -> Optional[Dict[str, Any]]:
+        """Return a copy of the best cached response within threshold, or None."""
+        v = self._normalize(vector)
+        keys = self._keys(v)
+        q, q_scale = _quantize(v)
+        q = q.astype(np.int32)  # widen once so the integer dot products can't overflow
+        now = time.monotonic()
+
+        candidates: Set[int] = set()
+        for table, key in zip(self._tables, keys):
+            candidates |= table.get(key, set())
+
+        best_id, best_score = None, self.threshold
+        for entry_id in candidates:
+            entry = self._entries.get(entry_id)
+            if entry is None:
+                continue
+            if now - entry.created_at > self.ttl_seconds:
+                self._remove(entry_id)
+                continue
+            if entry.scope != scope:
+                continue
+            score = int(np.dot(q, entry.vector)) * q_scale * entry.scale
+            if score >= best_score:
+                best_id, best_score = entry_id, score
+
+        if best_id is None:
+            return None
+        self._entries.move_to_end(best_id)
+        return copy.deepcopy(self._entries[best_id].response)
+
+    def insert(self, vector: Sequence[float], response: Dict[str, Any], scope: str = "") -> None:
+        """Cache a response for the given query embedding."""
+        v = self._normalize(vector)
+        keys = self._keys(v)
+        q, scale = _quantize(v)
+        entry_id = self._next_id
+        self._next_id += 1
+
+        self._entries[entry_id] = _Entry(
+            vector=q,
+            scale=scale,
+            scope=scope,
+            response=copy.deepcopy(response),
+            created_at=time.monotonic(),
+            keys=keys,
+        )
+        for table, key in zip(self._tables, keys):
+            table.setdefault(key, set()).add(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._tables = [{} for _ in range(self._num_tables)]
+        self._entries.clear()
+
+
+# Shared answer cache for /ask
+semantic_cache = SemanticCache(
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    ttl_seconds=SEMANTIC_CACHE_TTL_SECONDS,
+    max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+)
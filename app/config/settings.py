@@ -16,6 +16,9 @@ load_dotenv()
 # - prod : production     (pre-provisioned employee DB, future Azure AI Search)
 ENV = os.getenv("ENV", "dev").lower()
 
+# Root log level for the API process (DEBUG/INFO/WARNING/ERROR)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
 # -----------------------------------------------------------------------------
 # Azure OpenAI Configuration
 # -----------------------------------------------------------------------------
@@ -27,6 +30,8 @@ CHAT_MODEL = os.getenv("CHAT_MODEL")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
 STT_MODEL = os.getenv("STT_MODEL")
 TTS_MODEL = os.getenv("TTS_MODEL")
+# Summaries are short rewrites, so a smaller deployment can serve them (defaults to CHAT_MODEL)
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL") or CHAT_MODEL
 # Deployment name for Realtime API (To Implement)
 REALTIME_MODEL = os.getenv("REALTIME_MODEL", "gpt-realtime")
 
@@ -77,6 +82,27 @@ PDF_PATH = os.getenv("PDF_PATH")
 # -----------------------------------------------------------------------------
 SUMMARY_MAX_WORDS = int(os.getenv("SUMMARY_MAX_WORDS", "100"))
 
+# -----------------------------------------------------------------------------
+# Semantic Cache Configuration
+# -----------------------------------------------------------------------------
+# Reuses answers for near-identical questions (cosine similarity of query embeddings)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "10000"))
+# Reuses handbook search results (top-k documents) for near-identical queries
+RETRIEVAL_CACHE_THRESHOLD = float(os.getenv("RETRIEVAL_CACHE_THRESHOLD", "0.97"))
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "1024"))
+
+# -----------------------------------------------------------------------------
+# Session Store Configuration
+# -----------------------------------------------------------------------------
+# If REDIS_URL is set, conversation history lives in Redis (shared across workers);
+# otherwise it is kept in process memory (single worker only).
+REDIS_URL = os.getenv("REDIS_URL")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "20"))
+
 # -----------------------------------------------------------------------------
 # Azure Blob Storage Configuration (for audit trails)
 # -----------------------------------------------------------------------------
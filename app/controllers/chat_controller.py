@@ -2,9 +2,11 @@
 Chat Controller
 Handles HTTP requests for the chat API endpoints.
 """
+import orjson
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from app.models.request_models import Query, IntentResponse
-from app.services.rag_service import process_with_intent_classification
+from app.services.rag_service import process_with_intent_classification, stream_with_intent_classification
 from app.services.session_service import (
     get_session_history,
     add_to_session,
@@ -24,7 +26,7 @@ async def ask_question(query: Query):
     """
     try:
         # Get conversation history for this session
-        conversation_history = get_session_history(query.session_id)
+        conversation_history = await get_session_history(query.session_id)
         
         # Process question with intent classification and RAG
         result = await process_with_intent_classification(
@@ -33,9 +35,10 @@ async def ask_question(query: Query):
             session_id=query.session_id
         )
         
-        # Update session history if session_id is provided
+        # Update session history if session_id is provided. Awaited (not backgrounded)
+        # so a quick follow-up always sees this turn, and turns stay in order.
         if query.session_id and result.get("answer"):
-            add_to_session(
+            await add_to_session(
                 session_id=query.session_id,
                 user_message=query.question,
                 ai_message=result.get("answer", "")
@@ -47,13 +50,54 @@ async def ask_question(query: Query):
         raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
 
 
+def _sse(event: str, data: dict) -> bytes:
+    """Encode one Server-Sent Event."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+@router.post("/ask/stream")
+async def ask_question_stream(query: Query):
+    """
+    Streaming variant of /ask (Server-Sent Events).
+    Emits `intent`, then `token` events as the answer is generated, then `done`
+    with the final response (same schema as /ask).
+    """
+    try:
+        conversation_history = await get_session_history(query.session_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
+
+    async def event_stream():
+        try:
+            async for event, data in stream_with_intent_classification(
+                question=query.question,
+                conversation_history=conversation_history if conversation_history else None,
+                session_id=query.session_id
+            ):
+                if event == "done":
+                    data = IntentResponse(**data).model_dump()
+                    if query.session_id and data.get("answer"):
+                        # Recorded before `done` goes out, so the client's next question sees it
+                        await add_to_session(
+                            session_id=query.session_id,
+                            user_message=query.question,
+                            ai_message=data["answer"]
+                        )
+                yield _sse(event, data)
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            yield _sse("error", {"detail": f"Error processing question: {str(e)}"})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.post("/reset")
 async def reset_session(session_id: str):
     """
     Reset conversation history for a session.
     """
     try:
-        clear_session(session_id)
+        await clear_session(session_id)
         return {"message": f"Session {session_id} reset successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error resetting session: {str(e)}")
@@ -2,13 +2,107 @@
 Main FastAPI Application
 Entry point for the HR Voice Assistant API.
 """
+import queue
+import atexit
+import asyncio
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.controllers.chat_controller import router
+from fastapi.responses import ORJSONResponse
+from langchain_core.messages import HumanMessage
+from app.config.settings import LOG_LEVEL
+
+# Configure logging before the app modules (which log at import) are loaded.
+# Request code only enqueues records; a listener thread formats and writes them,
+# so stderr I/O never runs on the event loop.
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+logging.basicConfig(level=LOG_LEVEL, handlers=[QueueHandler(_log_queue)])
+_log_listener = QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)  # flushes queued records on exit
+
+from app.controllers.chat_controller import router  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+async def _warm_llm() -> None:
+    """Compiled agent graph + one tiny LLM call to prime the TLS connection and prompt path."""
+    from app.agents.rag_agent import rag_agent, get_llm  # noqa: F401
+    try:
+        await get_llm().bind(max_tokens=1).ainvoke([HumanMessage(content="ping")])
+    except Exception as e:
+        logger.warning("LLM warmup failed: %s", e)
+
+
+async def _warm_vectorstore() -> None:
+    """One search so Chroma loads the HNSW index into memory before the first /ask."""
+    from app.repositories.handbook_repository import vectorstore
+    try:
+        await vectorstore.asimilarity_search("warmup", k=1)
+    except Exception as e:
+        logger.warning("Vectorstore warmup failed: %s", e)
+
+
+async def _warm_session_store() -> None:
+    """Connect to the Redis session store (no-op for in-memory sessions)."""
+    from app.services.session_service import open_session_store
+    try:
+        await open_session_store()
+    except Exception as e:
+        logger.warning("Session store warmup failed: %s", e)
+
+
+async def _warm_employee_db() -> None:
+    """Open the async SQLite pool and touch the table so its pages are cached."""
+    from app.repositories.employee_repository import open_employee_pool, arun_employee_sql
+    try:
+        await open_employee_pool()
+        await arun_employee_sql("SELECT COUNT(*) FROM employees")
+    except Exception as e:
+        logger.warning("Employee DB warmup failed: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm cold paths at startup so the first user request doesn't pay for them."""
+    # Token encoder used by langchain_openai (lazy-loaded, ~100ms cold)
+    try:
+        import tiktoken
+        tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("tiktoken warmup failed: %s", e)
+
+    # Independent warmups (network, disk) run concurrently
+    await asyncio.gather(_warm_llm(), _warm_vectorstore(), _warm_employee_db(), _warm_session_store())
+
+    # Background writer for batched audit-trail records
+    from app.services.blob_storage_service import start_audit_flusher, stop_audit_flusher
+    start_audit_flusher()
+
+    yield
+
+    # aiosqlite connection threads are non-daemon; close them so shutdown doesn't hang
+    from app.repositories.employee_repository import close_employee_pool
+    from app.services.session_service import close_session_store
+    from app.services.blob_storage_service import close_blob_storage
+    from app.utils.http_clients import close_http_clients
+    await stop_audit_flusher()  # flush pending audit records before closing the blob client
+    await close_employee_pool()
+    await close_session_store()
+    await close_blob_storage()
+    await close_http_clients()
+
 
 app = FastAPI(
     title="HR Voice Assistant API",
     description="HR Voice Assistant with Intent Classification and RAG",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # orjson rendering for every JSON endpoint
 )
 
 # Include routers
@@ -24,4 +118,4 @@ async def root():
 @app.get("/health")
 async def health():
     """Health check endpoint."""
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
@@ -3,34 +3,42 @@ Employee Data Schema Definition
 Single source of truth for employee database schema.
 Used by RAG tools, SQL queries, and documentation.
 """
+from typing import List, Tuple
 
-Employee_Schema_Description = """
-Table: employees
-Columns:
-- employee_index_id (TEXT)
-- full_name (TEXT)
-- first_name (TEXT)
-- last_name (TEXT)
-- date_of_birth (TEXT)
-- age (INTEGER)
-- gender (TEXT)
-- marital_status (TEXT)
-- nationality (TEXT)
-- race (TEXT)
-- work_pass_type (TEXT)
-- mobile_number (TEXT)
-- personal_email (TEXT)
-- work_email (TEXT)
-- industry (TEXT)
-- job_title (TEXT)
-- employment_type (TEXT)
-- employment_status (TEXT)
-- employment_start_date (TEXT)
-- leave_taken (INTEGER)
-- department (TEXT)
+Employee_Columns: List[Tuple[str, str]] = [
+    ("employee_index_id", "TEXT"),
+    ("full_name", "TEXT"),
+    ("first_name", "TEXT"),
+    ("last_name", "TEXT"),
+    ("date_of_birth", "TEXT"),
+    ("age", "INTEGER"),
+    ("gender", "TEXT"),
+    ("marital_status", "TEXT"),
+    ("nationality", "TEXT"),
+    ("race", "TEXT"),
+    ("work_pass_type", "TEXT"),
+    ("mobile_number", "TEXT"),
+    ("personal_email", "TEXT"),
+    ("work_email", "TEXT"),
+    ("industry", "TEXT"),
+    ("job_title", "TEXT"),
+    ("employment_type", "TEXT"),
+    ("employment_status", "TEXT"),
+    ("employment_start_date", "TEXT"),
+    ("leave_taken", "INTEGER"),
+    ("department", "TEXT"),
+]
 
+# Compact schema for the SQL tool description (sent to the LLM on every turn,
+# so it is generated from the column list rather than spelled out as prose)
+Employee_Schema_Description = (
+    "employees("
+    + ", ".join(f"{name} {ctype}" for name, ctype in Employee_Columns)
+    + ")\n"
+    + """
 Usage guidance:
 - For headcount: SELECT COUNT(*) FROM employees WHERE department = 'Engineering';
 - For leave taken: SELECT leave_taken FROM employees WHERE full_name LIKE '%John%';
 - For employee lookup: SELECT * FROM employees WHERE full_name LIKE '%Jane Doe%';
-"""
\ No newline at end of file
+"""
+)
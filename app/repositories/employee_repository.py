@@ -6,36 +6,38 @@ Environment-specific behavior:
 - DEV: If the SQLite DB does not exist, it is auto-created from the CSV file.
 - UAT/PROD: The SQLite DB must be pre-provisioned; we DO NOT auto-create from CSV.
 """
+import asyncio
 import csv
+import io
+import logging
 import os
-import sqlite3
+import re
+import queue
 import threading
-from typing import List, Tuple, Optional
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, List, Optional
+import aiosqlite
+try:
+    # Newer SQLite build (pysqlite3-binary) with a better query planner, when installed
+    import pysqlite3 as sqlite3
+except ImportError:
+    import sqlite3
 from app.config.settings import EMPLOYEE_CSV_PATH, EMPLOYEE_DB_PATH, ENV
+from app.models.employee_schema import Employee_Columns
 
-Employee_Columns: List[Tuple[str, str]] = [
-    ("employee_index_id", "TEXT"),
-    ("full_name", "TEXT"),
-    ("first_name", "TEXT"),
-    ("last_name", "TEXT"),
-    ("date_of_birth", "TEXT"),
-    ("age", "INTEGER"),
-    ("gender", "TEXT"),
-    ("marital_status", "TEXT"),
-    ("nationality", "TEXT"),
-    ("race", "TEXT"),
-    ("work_pass_type", "TEXT"),
-    ("mobile_number", "TEXT"),
-    ("personal_email", "TEXT"),
-    ("work_email", "TEXT"),
-    ("industry", "TEXT"),
-    ("job_title", "TEXT"),
-    ("employment_type", "TEXT"),
-    ("employment_status", "TEXT"),
-    ("employment_start_date", "TEXT"),
-    ("leave_taken", "INTEGER"),
-    ("department", "TEXT"),
-]
+logger = logging.getLogger(__name__)
+
+_COL_SEP = " | "
+_SELECT_RE = re.compile(r"\s*select\b", re.I)
+_FORBIDDEN_RE = re.compile(
+    r"\b(?:update|insert|delete|drop|alter|create|attach|detach|pragma|vacuum)\b", re.I
+)
+# Tokens that matter for spotting a top-level LIMIT: literals/identifiers and comments
+# (skipped whole), parentheses (nesting depth) and the LIMIT keyword itself
+_LIMIT_SCAN_RE = re.compile(
+    r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]|--[^\n]*|/\*.*?\*/|(\()|(\))|\b(limit)\b",
+    re.I | re.S,
+)
 
 
 def ensure_employee_db(
@@ -69,17 +71,26 @@ def ensure_employee_db(
         missing_indexes = [idx for idx in required_indexes if idx not in existing_indexes]
 
         if missing_indexes:
-            print(f"[DB] Creating missing indexes: {missing_indexes}")
+            logger.info("[DB] Creating missing indexes: %s", missing_indexes)
             if "idx_department" in missing_indexes:
                 cur.execute("CREATE INDEX idx_department ON employees(department);")
             if "idx_full_name" in missing_indexes:
-                cur.execute("CREATE INDEX idx_full_name ON employees(full_name);")
+                cur.execute("CREATE INDEX idx_full_name ON employees(full_name COLLATE NOCASE);")
             if "idx_leave_taken" in missing_indexes:
                 cur.execute("CREATE INDEX idx_leave_taken ON employees(leave_taken);")
             if "idx_employment_status" in missing_indexes:
                 cur.execute("CREATE INDEX idx_employment_status ON employees(employment_status);")
+            # Refresh planner statistics for the new indexes
+            cur.execute("ANALYZE;")
             conn.commit()
 
+        # WAL lets the read-only pool connections read concurrently (persisted in the DB file)
+        if cur.execute("PRAGMA journal_mode;").fetchone()[0] != "wal":
+            try:
+                cur.execute("PRAGMA journal_mode=WAL;")
+            except sqlite3.OperationalError as e:
+                logger.warning("[DB] Could not enable WAL mode: %s", e)
+
         conn.close()
         return db_path
 
@@ -95,104 +106,319 @@ def ensure_employee_db(
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"Employee CSV not found: {csv_path}")
 
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cur = conn.cursor()
 
+    # One-shot seed: no journal, no fsync, no lock churn, everything in a single transaction
+    cur.executescript(
+        "PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF; "
+        "PRAGMA locking_mode=EXCLUSIVE; PRAGMA temp_store=MEMORY;"
+    )
+    cur.execute("BEGIN;")
+
     # Create table
     columns_sql = ", ".join([f"{name} {ctype}" for name, ctype in Employee_Columns])
     cur.execute(f"CREATE TABLE employees ({columns_sql});")
 
-    # Load CSV
+    # Stream CSV rows straight into executemany (no intermediate list)
+    placeholders = ", ".join(["?"] * len(Employee_Columns))
     with open(csv_path, "r", encoding="utf-8") as f:
         reader = csv.DictReader(f)
-        rows = [
-            tuple(row.get(col, "").strip() or None for col, _ in Employee_Columns)
+        rows = (
+            tuple((row.get(col) or "").strip() or None for col, _ in Employee_Columns)
             for row in reader
-        ]
-
-    placeholders = ", ".join(["?"] * len(Employee_Columns))
-    cur.executemany(
-        f"INSERT INTO employees VALUES ({placeholders});",
-        rows,
-    )
+        )
+        cur.executemany(
+            f"INSERT INTO employees VALUES ({placeholders});",
+            rows,
+        )
 
     # Create indexes for frequently queried columns
-    print("[DB] Creating indexes for performance optimization...")
+    logger.info("[DB] Creating indexes for performance optimization...")
     cur.execute("CREATE INDEX idx_department ON employees(department);")
-    cur.execute("CREATE INDEX idx_full_name ON employees(full_name);")
+    # NOCASE matches LIKE's case-insensitivity, so prefix patterns ('Jane%') and
+    # NOCASE equality can use it; the tool's usual '%name%' lookups still scan the table
+    cur.execute("CREATE INDEX idx_full_name ON employees(full_name COLLATE NOCASE);")
     cur.execute("CREATE INDEX idx_leave_taken ON employees(leave_taken);")
     cur.execute("CREATE INDEX idx_employment_status ON employees(employment_status);")
 
+    # Collect statistics so the query planner picks the new indexes
+    cur.execute("ANALYZE;")
+
     conn.commit()
+    # Drop the bulk-load settings and switch to WAL for concurrent readers
+    cur.execute("PRAGMA locking_mode=NORMAL;")
+    cur.execute("PRAGMA journal_mode=WAL;")
     conn.close()
-    print(f"[DB] Database created with indexes: {db_path}")
+    logger.info("[DB] Database created with indexes: %s", db_path)
     return db_path
 
 
 # Ensure database exists when module is imported
 EMPLOYEE_DB_PATH = ensure_employee_db(EMPLOYEE_CSV_PATH, EMPLOYEE_DB_PATH)
 
-# Thread-local storage for connection reuse (thread-safe)
-_thread_local = threading.local()
+# Size of the async pool (the sync pool has its own, smaller SYNC_POOL_SIZE)
+DB_POOL_SIZE = 8
+_DB_URI = f"file:{EMPLOYEE_DB_PATH}?mode=ro"
+
+
+# Statement actions a plain SELECT needs; everything else (writes, PRAGMA, ATTACH, ...) is denied
+_READ_ONLY_ACTIONS = frozenset({
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE,
+})
+
+
+def _read_only_authorizer(action, arg1, arg2, db_name, trigger) -> int:
+    """SQLite authorizer: allow only what a SELECT needs (checked once per statement prepare)."""
+    return sqlite3.SQLITE_OK if action in _READ_ONLY_ACTIONS else sqlite3.SQLITE_DENY
+
+
+class _ReadOnlyConnection(sqlite3.Connection):
+    """
+    Tuned read-only connection to the employee DB.
+    Used as the sqlite3 `factory` for both the sync and the aiosqlite pools, so every
+    pooled connection gets the same PRAGMAs and the read-only authorizer.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.execute("PRAGMA synchronous=NORMAL;")
+        self.execute("PRAGMA mmap_size=268435456;")  # 256 MB
+        self.execute("PRAGMA cache_size=-131072;")  # 128 MB
+        self.execute("PRAGMA temp_store=MEMORY;")
+        self.execute("PRAGMA query_only=ON;")
+        # Installed last: from here on the engine itself rejects anything but reads
+        self.set_authorizer(_read_only_authorizer)
+
+
+def _open_read_only_connection() -> sqlite3.Connection:
+    """Open a read-only connection for the sync pool."""
+    conn = sqlite3.connect(
+        _DB_URI,
+        uri=True,
+        check_same_thread=False,
+        isolation_level=None,
+        factory=_ReadOnlyConnection,
+    )
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+# Bounded pool of connections for synchronous callers (e.g. tool.invoke). The request
+# path uses the async pool, so connections are only opened on demand, up to the size.
+# LIFO keeps the most recently used (cache-warm) connection in play.
+SYNC_POOL_SIZE = 2
+_SYNC_POOL: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=SYNC_POOL_SIZE)
+_sync_pool_opened = 0
+_sync_pool_lock = threading.Lock()
+
+
+def _sync_pool_get() -> sqlite3.Connection:
+    """Take an idle connection, open a new one while under the size, else wait for one."""
+    global _sync_pool_opened
+    try:
+        return _SYNC_POOL.get_nowait()
+    except queue.Empty:
+        pass
+    with _sync_pool_lock:
+        can_open = _sync_pool_opened < SYNC_POOL_SIZE
+        if can_open:
+            _sync_pool_opened += 1
+    if not can_open:
+        return _SYNC_POOL.get()
+    try:
+        return _open_read_only_connection()
+    except BaseException:
+        with _sync_pool_lock:
+            _sync_pool_opened -= 1
+        raise
+
+
+@contextmanager
+def _pool_acquire() -> Iterator[sqlite3.Connection]:
+    """Borrow a connection from the sync pool for the duration of the block."""
+    conn = _sync_pool_get()
+    try:
+        yield conn
+    finally:
+        _SYNC_POOL.put_nowait(conn)
+
+
+class SqlitePool:
+    """
+    Small pool of read-only aiosqlite connections.
+    With WAL, SQLite serves many readers at once, so concurrent tool calls each
+    get their own connection instead of queuing behind a single one.
+    """
+
+    def __init__(self, db_uri: str, size: int = DB_POOL_SIZE):
+        self._db_uri = db_uri
+        self._size = size
+        self._queue: Optional[asyncio.Queue] = None
+        self._lock = asyncio.Lock()
+
+    async def open(self) -> None:
+        """Eagerly open all connections (idempotent)."""
+        if self._queue is not None:
+            return
+        async with self._lock:
+            if self._queue is not None:
+                return
+            queue: asyncio.Queue = asyncio.Queue(maxsize=self._size)
+            for _ in range(self._size):
+                # Built from our own connector (not aiosqlite.connect) so the pool uses the
+                # same sqlite3 module as the sync path, including the pysqlite3 build
+                conn = await aiosqlite.Connection(
+                    lambda: sqlite3.connect(
+                        self._db_uri, uri=True, isolation_level=None, factory=_ReadOnlyConnection
+                    ),
+                    iter_chunk_size=64,
+                )
+                queue.put_nowait(conn)
+            self._queue = queue
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a connection for the duration of the block."""
+        await self.open()
+        conn = await self._queue.get()
+        try:
+            yield conn
+        finally:
+            self._queue.put_nowait(conn)
+
+    async def close(self) -> None:
+        """Close all pooled connections (their worker threads would otherwise keep the process alive)."""
+        async with self._lock:
+            if self._queue is None:
+                return
+            while not self._queue.empty():
+                await self._queue.get_nowait().close()
+            self._queue = None
+
 
-def _get_connection(db_path: str = EMPLOYEE_DB_PATH) -> sqlite3.Connection:
+# Async pool for the agent's tool path (opened lazily on the event loop)
+_POOL = SqlitePool(_DB_URI)
+
+
+def _check_read_only(sql_query: str) -> Optional[str]:
+    """Return an error message if the query is not a single read-only SELECT, else None."""
+    if not _SELECT_RE.match(sql_query):
+        return "Only SELECT queries are allowed."
+
+    # Cheap pre-filter: block mutation keywords (whole words only, so e.g. `update_date` is fine).
+    # The real boundary is the read-only authorizer installed on every pooled connection.
+    if _FORBIDDEN_RE.search(sql_query):
+        return "Only read-only SELECT queries are permitted."
+
+    # No unterminated literals/comments. The terminator goes on its own line so a
+    # trailing `--` comment can't swallow it; `;` inside literals is fine, and stacked
+    # statements are refused by execute() itself ("You can only execute one statement")
+    body = sql_query.strip().rstrip(";")
+    if not sqlite3.complete_statement(body + "\n;"):
+        return "Only a single, complete SELECT statement is allowed."
+
+    return None
+
+
+def _has_top_level_limit(sql: str) -> bool:
+    """True if the statement has its own LIMIT outside any subquery."""
+    depth = 0
+    for m in _LIMIT_SCAN_RE.finditer(sql):
+        if m.group(1):
+            depth += 1
+        elif m.group(2):
+            depth -= 1
+        elif m.group(3) and depth == 0:
+            return True
+    return False
+
+
+def _with_row_limit(sql_query: str, row_limit: int) -> str:
     """
-    Get a thread-local database connection. Reuses connection within the same thread.
-    Thread-safe for parallel execution.
+    Push the row limit into SQLite (for a query that passed _check_read_only).
+    Appending LIMIT lets SQLite stop after row_limit rows and sort with a bounded
+    top-N sorter instead of ordering the whole table; result columns and ORDER BY
+    are untouched. It goes on its own line so a trailing `--` comment can't hide it.
+    A query with its own top-level LIMIT is left as is (callers still fetch at
+    most row_limit rows).
     """
-    if not hasattr(_thread_local, 'connection') or _thread_local.connection is None:
-        _thread_local.connection = sqlite3.connect(db_path, check_same_thread=False)
-        # Enable row factory for better result handling
-        _thread_local.connection.row_factory = sqlite3.Row
-    return _thread_local.connection
+    body = sql_query.strip().rstrip(";")
+    if _has_top_level_limit(body):
+        return body
+    return f"{body}\nLIMIT {int(row_limit)}"
 
-def _close_connection():
-    """Close the thread-local connection (called on thread exit or cleanup)."""
-    if hasattr(_thread_local, 'connection') and _thread_local.connection is not None:
-        _thread_local.connection.close()
-        _thread_local.connection = None
+
+def _format_rows(col_names: List[str], rows: list) -> str:
+    """Format query results as a markdown table."""
+    if not rows:
+        return "No results."
+
+    # One pre-built format string per result set: str() coercion happens inside format()
+    fmt = "\n" + _COL_SEP.join(("{}",) * len(col_names))
+    buf = io.StringIO()
+    buf.write(_COL_SEP.join(col_names))
+    buf.write("\n")
+    buf.write(_COL_SEP.join(("---",) * len(col_names)))
+    for row in rows:
+        buf.write(fmt.format(*["" if val is None else val for val in row]))
+    return buf.getvalue()
 
 
 def run_employee_sql(
-    sql_query: str, db_path: str = EMPLOYEE_DB_PATH, row_limit: int = 50
+    sql_query: str, row_limit: int = 50
 ) -> str:
     """
     Execute a read-only SQL query against the employee database.
     Only SELECT statements are allowed. Returns rows as a simple table string.
-    Uses connection pooling for better performance.
+    Uses a pooled read-only connection to EMPLOYEE_DB_PATH.
     """
-    sql_lower = sql_query.strip().lower()
-    if not sql_lower.startswith("select"):
-        return "Only SELECT queries are allowed."
+    error = _check_read_only(sql_query)
+    if error:
+        return error
 
-    # Basic safety: block mutation keywords
-    forbidden = ["update ", "insert ", "delete ", "drop ", "alter ", "create "]
-    if any(word in sql_lower for word in forbidden):
-        return "Only read-only SELECT queries are permitted."
+    try:
+        with _pool_acquire() as conn:
+            cur = conn.execute(_with_row_limit(sql_query, row_limit))
+            rows = cur.fetchmany(row_limit)
+            col_names = [desc[0] for desc in cur.description] if cur.description else []
+    except Exception as e:
+        return f"SQL execution error: {e}"
+
+    return _format_rows(col_names, rows)
 
-    # Get thread-local connection (reused if available)
-    conn = _get_connection(db_path)
-    cur = conn.cursor()
+
+async def arun_employee_sql(
+    sql_query: str, row_limit: int = 50
+) -> str:
+    """
+    Async version of run_employee_sql.
+    Runs on a pooled aiosqlite connection so the event loop is never blocked
+    and concurrent tool calls read in parallel without an executor hop.
+    """
+    error = _check_read_only(sql_query)
+    if error:
+        return error
 
     try:
-        cur.execute(sql_query)
-        rows = cur.fetchall()
-        # Convert Row objects to tuples for compatibility
-        rows = [tuple(row) for row in rows]
-        col_names = [desc[0] for desc in cur.description] if cur.description else []
+        async with _POOL.acquire() as conn:
+            async with conn.execute(_with_row_limit(sql_query, row_limit)) as cur:
+                rows = await cur.fetchmany(row_limit)
+                col_names = [desc[0] for desc in cur.description] if cur.description else []
     except Exception as e:
         return f"SQL execution error: {e}"
 
-    if not rows:
-        return "No results."
+    return _format_rows(col_names, rows)
 
-    # Apply row limit for display
-    rows = rows[:row_limit]
 
-    # Format as markdown table
-    header = " | ".join(col_names)
-    separator = " | ".join(["---"] * len(col_names))
-    lines = [header, separator]
-    for row in rows:
-        lines.append(" | ".join([str(val) if val is not None else "" for val in row]))
-    return "\n".join(lines)
\ No newline at end of file
+async def open_employee_pool() -> None:
+    """Open the async connection pool eagerly (called on application startup)."""
+    await _POOL.open()
+
+
+async def close_employee_pool() -> None:
+    """Close the async connection pool (called on application shutdown)."""
+    await _POOL.close()
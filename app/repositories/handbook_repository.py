@@ -10,12 +10,80 @@ Environment behavior:
   (e.g. Azure AI Search) by updating this module while keeping the retriever
   interface the same.
 """
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
 from langchain_chroma import Chroma
+from langchain_core.documents import Document
 from langchain_openai import AzureOpenAIEmbeddings
-from app.config.settings import VECTORSTORE_PERSIST_DIRECTORY, VECTORSTORE_COLLECTION_NAME, EMBEDDING_MODEL
+from app.config.settings import (
+    VECTORSTORE_PERSIST_DIRECTORY,
+    VECTORSTORE_COLLECTION_NAME,
+    EMBEDDING_MODEL,
+    RETRIEVAL_CACHE_THRESHOLD,
+    RETRIEVAL_CACHE_MAX_ENTRIES,
+)
+from app.cache.semantic_cache import SemanticCache
+from app.utils.http_clients import shared_async_http_client
+
+QUERY_EMBEDDING_CACHE_SIZE = 2048
+HANDBOOK_TOP_K = 4
+
+# LRU of query embeddings keyed by (model, text); shared by sync and async paths
+_query_cache: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+_query_cache_lock = threading.Lock()
+# In-flight async embedding requests, so concurrent identical queries make one API call
+_inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+
+
+def _cache_get(key: Tuple[str, str]):
+    with _query_cache_lock:
+        vector = _query_cache.get(key)
+        if vector is not None:
+            _query_cache.move_to_end(key)
+        return vector
+
+
+def _cache_put(key: Tuple[str, str], vector: List[float]) -> None:
+    with _query_cache_lock:
+        _query_cache[key] = vector
+        _query_cache.move_to_end(key)
+        while len(_query_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+
+
+class CachedAzureOpenAIEmbeddings(AzureOpenAIEmbeddings):
+    """AzureOpenAIEmbeddings with an LRU cache (and async single-flight) for query embeddings."""
+
+    def embed_query(self, text: str) -> List[float]:
+        key = (self.model, text)
+        vector = _cache_get(key)
+        if vector is None:
+            vector = super().embed_query(text)
+            _cache_put(key, vector)
+        return list(vector)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = (self.model, text)
+        vector = _cache_get(key)
+        if vector is None:
+            task = _inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(super().aembed_query(text))
+                _inflight[key] = task
+                task.add_done_callback(lambda _: _inflight.pop(key, None))
+            # Shield so one caller's cancellation doesn't cancel the shared request
+            vector = await asyncio.shield(task)
+            _cache_put(key, vector)
+        return list(vector)
+
 
 # Initialize embeddings
-embeddings = AzureOpenAIEmbeddings(model=EMBEDDING_MODEL)
+embeddings = CachedAzureOpenAIEmbeddings(
+    model=EMBEDDING_MODEL,
+    http_async_client=shared_async_http_client,
+)
 
 # Initialize local Chroma vectorstore.
 # Note: Even in UAT/PROD we currently use Chroma; once Azure AI Search is wired up,
@@ -29,5 +97,29 @@ vectorstore = Chroma(
 # Create retriever (same behavior across environments for now)
 retriever = vectorstore.as_retriever(
     search_type="similarity",
-    search_kwargs={"k": 4},
-)
\ No newline at end of file
+    search_kwargs={"k": HANDBOOK_TOP_K},
+)
+
+# Near-duplicate queries reuse the previous top-k documents instead of re-searching Chroma.
+# The index only changes through an offline rebuild followed by a restart, which starts
+# with an empty cache, so entries never expire.
+_retrieval_cache = SemanticCache(
+    threshold=RETRIEVAL_CACHE_THRESHOLD,
+    ttl_seconds=float("inf"),
+    max_entries=RETRIEVAL_CACHE_MAX_ENTRIES,
+)
+
+
+async def asearch_handbook(query: str) -> List[Document]:
+    """
+    Top-k handbook documents for a query.
+    Embeds via the cached embeddings, then searches by vector so Chroma doesn't embed again.
+    """
+    query_vector = await embeddings.aembed_query(query)
+    cached = _retrieval_cache.lookup(query_vector)
+    if cached is not None:
+        return cached["documents"]
+
+    docs = await vectorstore.asimilarity_search_by_vector(query_vector, k=HANDBOOK_TOP_K)
+    _retrieval_cache.insert(query_vector, {"documents": docs})
+    return docs
@@ -1,12 +1,15 @@
 """
 Blob Storage Service
 Handles storage of interaction audit trails in Azure Blob Storage.
-Stores session interactions as JSON files (one file per session).
+Stores session interactions as append blobs of NDJSON (one blob per session,
+one JSON line per interaction), so each write uploads only the new record.
+Uses the async SDK, so audit I/O runs on the event loop without occupying a worker thread.
 """
-import json
 import asyncio
+import logging
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List
+import orjson
 from app.config.settings import (
     ENV,
     AZURE_STORAGE_CONNECTION_STRING,
@@ -15,28 +18,46 @@ from app.config.settings import (
     AZURE_STORAGE_CONTAINER_NAME,
 )
 
-# Try to import Azure Blob Storage SDK
+logger = logging.getLogger(__name__)
+
+# Try to import Azure Blob Storage SDK (the async client also needs aiohttp)
 try:
-    from azure.storage.blob import BlobServiceClient, BlobClient
-    from azure.core.exceptions import AzureError
+    from azure.core import MatchConditions
+    from azure.storage.blob import ContentSettings
+    from azure.storage.blob.aio import BlobServiceClient, BlobClient, ContainerClient
+    from azure.core.exceptions import (
+        AzureError,
+        ResourceExistsError,
+        ResourceModifiedError,
+        ResourceNotFoundError,
+    )
     AZURE_BLOB_AVAILABLE = True
 except ImportError:
     AZURE_BLOB_AVAILABLE = False
-    print("[Blob Storage] Azure Blob Storage SDK not installed. Storage will be disabled.")
+    logger.warning("[Blob Storage] Azure Blob Storage SDK not installed. Storage will be disabled.")
 
 
 def _is_blob_storage_configured() -> bool:
     """Check if blob storage is configured and available."""
     if not AZURE_BLOB_AVAILABLE:
         return False
-    
+
     # Check if we have at least one auth method configured
     has_connection_string = bool(AZURE_STORAGE_CONNECTION_STRING)
     has_account_auth = bool(AZURE_STORAGE_ACCOUNT_NAME and AZURE_STORAGE_ACCOUNT_KEY)
-    
+
     return has_connection_string or has_account_auth
 
 
+# Settings and SDK availability are fixed for the process; decide once at import
+_BLOB_ENABLED = _is_blob_storage_configured()
+
+
+def _blob_name(session_id: str) -> str:
+    """Blob name for a session's audit trail."""
+    return f"{session_id}.ndjson"
+
+
 def _get_blob_service_client():
     """Get Azure Blob Service client."""
     if AZURE_STORAGE_CONNECTION_STRING:
@@ -48,6 +69,97 @@ def _get_blob_service_client():
         raise ValueError("Azure Blob Storage credentials not configured")
 
 
+# Shared async clients (one connection pool for every audit call), created on first use
+_service_client: Optional["BlobServiceClient"] = None
+_container_client: Optional["ContainerClient"] = None
+_container_lock = asyncio.Lock()
+
+
+async def _container() -> "ContainerClient":
+    """Shared ContainerClient; creates the audit container on first use (once per process)."""
+    global _service_client, _container_client
+    if _container_client is not None:
+        return _container_client
+    async with _container_lock:
+        if _container_client is None:
+            service_client = _get_blob_service_client()
+            container_client = service_client.get_container_client(AZURE_STORAGE_CONTAINER_NAME)
+            try:
+                await container_client.create_container()
+            except ResourceExistsError:
+                pass
+            _service_client, _container_client = service_client, container_client
+    return _container_client
+
+
+async def close_blob_storage() -> None:
+    """Close the shared blob clients (called on application shutdown)."""
+    global _service_client, _container_client
+    if _service_client is not None:
+        await _service_client.close()
+        _service_client = _container_client = None
+
+
+async def _create_append_blob(blob_client: "BlobClient") -> None:
+    """Create an empty NDJSON append blob (no-op if another writer just created it)."""
+    try:
+        await blob_client.create_append_blob(
+            content_settings=ContentSettings(content_type="application/x-ndjson"),
+            match_condition=MatchConditions.IfMissing,  # never truncate an existing trail
+        )
+    except (ResourceExistsError, ResourceModifiedError):
+        pass
+
+
+async def _append_records(session_id: str, data: bytes) -> str:
+    """Append NDJSON bytes to a session's audit blob, creating it if needed. Returns the blob URL."""
+    blob_client = (await _container()).get_blob_client(_blob_name(session_id))
+    # Append is atomic server-side; concurrent writers can't lose updates
+    try:
+        await blob_client.append_block(data)
+    except ResourceNotFoundError:
+        # Session's first interaction: create the append blob, then append
+        await _create_append_blob(blob_client)
+        await blob_client.append_block(data)
+    return blob_client.url
+
+
+# One NDJSON line per record: orjson appends the newline itself (no extra bytes copy),
+# and tolerates non-string dict keys that may appear in LLM-extracted entities
+_NDJSON_OPTS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+
+
+def _dump_record(interaction: Dict[str, Any]) -> bytes:
+    """Serialize one audit record as an NDJSON line."""
+    return orjson.dumps(interaction, option=_NDJSON_OPTS)
+
+
+def _build_interaction(
+    question: str,
+    intent_result: Dict[str, Any],
+    full_response: str,
+    summary: str,
+    summary_length: int,
+    tools_used: Optional[List[str]],
+    response_time_ms: Optional[float],
+) -> Dict[str, Any]:
+    """Audit record for one interaction (serialized by _dump_record)."""
+    return {
+        # orjson encodes datetimes natively (same RFC 3339 text as isoformat())
+        "timestamp": datetime.now(timezone.utc),
+        "question": question,
+        "intent": intent_result,
+        "full_response": full_response,
+        "summary": summary,
+        "summary_length": summary_length,
+        "tools_used": tools_used or [],
+        "metadata": {
+            "env": ENV,
+            "response_time_ms": response_time_ms,
+        }
+    }
+
+
 async def store_interaction(
     session_id: str,
     question: str,
@@ -59,9 +171,9 @@ async def store_interaction(
     response_time_ms: Optional[float] = None,
 ) -> Optional[str]:
     """
-    Store an interaction to Azure Blob Storage (one JSON file per session).
-    Appends to existing session file or creates new one.
-    
+    Store an interaction to Azure Blob Storage (one NDJSON append blob per session).
+    Appends a line to the existing session blob or creates a new one.
+
     Args:
         session_id: Session identifier
         question: User's question
@@ -71,19 +183,16 @@ async def store_interaction(
         summary_length: Maximum word count used for summary
         tools_used: List of tool names used (optional)
         response_time_ms: Response time in milliseconds (optional)
-    
+
     Returns:
         Blob URL if successful, None if storage is not configured or fails
     """
-    if not _is_blob_storage_configured():
+    if not _BLOB_ENABLED:
         # Silently skip if not configured (common in dev)
         return None
-    
+
     try:
-        # Run in thread pool to avoid blocking (blob operations are sync)
-        return await asyncio.to_thread(
-            _store_interaction_sync,
-            session_id,
+        interaction = _build_interaction(
             question,
             intent_result,
             full_response,
@@ -92,121 +201,178 @@ async def store_interaction(
             tools_used,
             response_time_ms,
         )
+        return await _append_records(session_id, _dump_record(interaction))
     except Exception as e:
         # Log but don't fail the request
-        print(f"[Blob Storage] Error storing interaction: {e}")
+        logger.error("[Blob Storage] Error storing interaction: %s", e)
         return None
 
 
-def _store_interaction_sync(
+# -----------------------------------------------------------------------------
+# Batched audit writes
+# -----------------------------------------------------------------------------
+# Requests enqueue records; one background flusher drains whatever has accumulated
+# and issues one append_block per session, so a burst of interactions costs a few
+# round-trips instead of one each, and outbound blob connections stay bounded.
+AUDIT_QUEUE_SIZE = 1024
+AUDIT_BATCH_SIZE = 256
+_MAX_APPEND_BYTES = 4 * 1024 * 1024  # append_block payload limit
+AUDIT_SHUTDOWN_TIMEOUT_SECONDS = 10  # bound on the final flush, so shutdown never hangs
+
+_audit_queue: "asyncio.Queue[tuple[str, bytes]]" = asyncio.Queue(maxsize=AUDIT_QUEUE_SIZE)
+_flusher_task: Optional[asyncio.Task] = None
+
+
+def _split_appends(records: List[bytes]) -> List[bytes]:
+    """Concatenate NDJSON records into as few append_block payloads as the size limit allows."""
+    payloads: List[bytes] = []
+    current: List[bytes] = []
+    size = 0
+    for record in records:
+        if current and size + len(record) > _MAX_APPEND_BYTES:
+            payloads.append(b"".join(current))
+            current, size = [], 0
+        current.append(record)
+        size += len(record)
+    if current:
+        payloads.append(b"".join(current))
+    return payloads
+
+
+async def _flush_session(session_id: str, records: List[bytes]) -> None:
+    try:
+        for payload in _split_appends(records):
+            await _append_records(session_id, payload)
+    except Exception as e:
+        logger.error("[Blob Storage] Error storing %d interaction(s) for %s: %s", len(records), session_id, e)
+
+
+async def _flush_batch(batch: List[tuple]) -> None:
+    """Write a batch of queued records, one append per session (sessions in parallel)."""
+    by_session: Dict[str, List[bytes]] = {}
+    for session_id, record in batch:
+        by_session.setdefault(session_id, []).append(record)
+    await asyncio.gather(*(_flush_session(sid, records) for sid, records in by_session.items()))
+
+
+async def _audit_flusher() -> None:
+    """Drain the audit queue forever, flushing whatever has accumulated as one batch."""
+    while True:
+        batch = [await _audit_queue.get()]
+        while len(batch) < AUDIT_BATCH_SIZE:
+            try:
+                batch.append(_audit_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        try:
+            await _flush_batch(batch)
+        finally:
+            for _ in batch:
+                _audit_queue.task_done()
+
+
+def start_audit_flusher() -> None:
+    """Start the background audit flusher (idempotent; needs a running event loop)."""
+    global _flusher_task
+    if _flusher_task is None or _flusher_task.done():
+        _flusher_task = asyncio.get_running_loop().create_task(_audit_flusher())
+
+
+async def stop_audit_flusher() -> None:
+    """Flush pending audit records, then stop the flusher (called on application shutdown)."""
+    global _flusher_task
+    if _flusher_task is None:
+        return
+    try:
+        await asyncio.wait_for(_audit_queue.join(), timeout=AUDIT_SHUTDOWN_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        # Blob storage unreachable: give up on what's left rather than block teardown
+        logger.error(
+            "[Blob Storage] Audit flush timed out after %ss, dropping %d queued interaction(s)",
+            AUDIT_SHUTDOWN_TIMEOUT_SECONDS, _audit_queue.qsize(),
+        )
+    _flusher_task.cancel()
+    try:
+        await _flusher_task
+    except asyncio.CancelledError:
+        pass
+    _flusher_task = None
+
+
+def enqueue_interaction(
     session_id: str,
     question: str,
     intent_result: Dict[str, Any],
     full_response: str,
     summary: str,
     summary_length: int,
-    tools_used: Optional[List[str]],
-    response_time_ms: Optional[float],
-) -> Optional[str]:
-    """Synchronous version of store_interaction for thread pool execution."""
+    tools_used: Optional[List[str]] = None,
+    response_time_ms: Optional[float] = None,
+) -> None:
+    """
+    Queue an interaction for a batched write (same arguments as store_interaction).
+    Never blocks: if the queue is full the record is dropped with an error log.
+    """
+    if not _BLOB_ENABLED:
+        return
+
+    interaction = _build_interaction(
+        question,
+        intent_result,
+        full_response,
+        summary,
+        summary_length,
+        tools_used,
+        response_time_ms,
+    )
+    start_audit_flusher()
     try:
-        blob_service_client = _get_blob_service_client()
-        container_client = blob_service_client.get_container_client(AZURE_STORAGE_CONTAINER_NAME)
-        
-        # Ensure container exists
-        try:
-            container_client.create_container()
-        except Exception:
-            # Container likely already exists, ignore
-            pass
-        
-        # Blob name: {session_id}.json
-        blob_name = f"{session_id}.json"
-        blob_client = container_client.get_blob_client(blob_name)
-        
-        # Read existing session data if it exists
-        session_data = {
-            "session_id": session_id,
-            "created_at": None,
-            "interactions": []
-        }
-        
-        try:
-            existing_blob = blob_client.download_blob()
-            existing_content = existing_blob.readall().decode('utf-8')
-            session_data = json.loads(existing_content)
-        except Exception:
-            # Blob doesn't exist yet, use default structure
-            session_data["created_at"] = datetime.now(timezone.utc).isoformat()
-        
-        # Create new interaction entry
-        interaction = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "question": question,
-            "intent": intent_result,
-            "full_response": full_response,
-            "summary": summary,
-            "summary_length": summary_length,
-            "tools_used": tools_used or [],
-            "metadata": {
-                "env": ENV,
-                "response_time_ms": response_time_ms,
-            }
-        }
-        
-        # Append interaction
-        session_data["interactions"].append(interaction)
-        
-        # Write updated session data back to blob
-        updated_content = json.dumps(session_data, indent=2, ensure_ascii=False)
-        blob_client.upload_blob(
-            updated_content,
-            overwrite=True,
-            content_settings={"content_type": "application/json"}
-        )
-        
-        # Return blob URL
-        blob_url = blob_client.url
-        return blob_url
-        
-    except Exception as e:
-        print(f"[Blob Storage] Error in _store_interaction_sync: {e}")
-        return None
+        _audit_queue.put_nowait((session_id, _dump_record(interaction)))
+    except asyncio.QueueFull:
+        logger.error("[Blob Storage] Audit queue full, dropping interaction for %s", session_id)
+
+
+async def _iter_ndjson(downloader) -> AsyncIterator[Dict[str, Any]]:
+    """Parse NDJSON records as the download streams in, chunk by chunk.
+    Only the partial line at a chunk boundary is carried over, so the raw bytes
+    in memory are bounded by one chunk plus one line (the caller decides whether
+    to keep the parsed records; get_session_interactions collects them all)."""
+    tail = b""
+    async for chunk in downloader.chunks():
+        lines = (tail + chunk).split(b"\n") if tail else chunk.split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield orjson.loads(line)
+    if tail.strip():
+        yield orjson.loads(tail)
 
 
 async def get_session_interactions(session_id: str) -> Optional[Dict[str, Any]]:
     """
     Retrieve all interactions for a session from blob storage.
-    
+
     Args:
         session_id: Session identifier
-    
+
     Returns:
         Session data dictionary or None if not found/configured
     """
-    if not _is_blob_storage_configured():
+    if not _BLOB_ENABLED:
         return None
-    
-    try:
-        return await asyncio.to_thread(_get_session_interactions_sync, session_id)
-    except Exception as e:
-        print(f"[Blob Storage] Error retrieving session interactions: {e}")
-        return None
-
 
-def _get_session_interactions_sync(session_id: str) -> Optional[Dict[str, Any]]:
-    """Synchronous version of get_session_interactions."""
     try:
-        blob_service_client = _get_blob_service_client()
-        container_client = blob_service_client.get_container_client(AZURE_STORAGE_CONTAINER_NAME)
-        blob_name = f"{session_id}.json"
-        blob_client = container_client.get_blob_client(blob_name)
-        
-        existing_blob = blob_client.download_blob()
-        content = existing_blob.readall().decode('utf-8')
-        return json.loads(content)
-        
-    except Exception:
-        # Blob doesn't exist or error reading
+        blob_client = (await _container()).get_blob_client(_blob_name(session_id))
+        downloader = await blob_client.download_blob()
+        created_at = downloader.properties.creation_time
+        return {
+            "session_id": session_id,
+            "created_at": created_at.isoformat() if created_at else None,
+            "interactions": [interaction async for interaction in _iter_ndjson(downloader)],
+        }
+    except ResourceNotFoundError:
+        # No interactions stored for this session
+        return None
+    except Exception as e:
+        logger.error("[Blob Storage] Error retrieving session interactions: %s", e)
         return None
-
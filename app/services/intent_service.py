@@ -3,21 +3,70 @@ Intent Classification Service
 Business logic for intent classification and entity extraction.
 """
 import os
-import json
-from typing import Dict, Any, Optional
+import re
+import copy
+import logging
+import orjson
+from typing import Dict, Any, Optional, Tuple
+from cachetools import TTLCache
 from langchain_openai import AzureChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from app.config.settings import CHAT_MODEL, AZURE_OPENAI_API_VERSION, INTENT_CLASSIFICATION_PROMPT_PATH
 from app.utils.prompt_loader import load_prompt
+from app.utils.http_clients import shared_async_http_client
 
-# Load intent classification prompt
+logger = logging.getLogger(__name__)
+
+# Extracts the JSON object from a fenced ```json block, or the first bare {...} span
+_JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```|(\{.*\})", re.S)
+
+# Default entity structure (copied per response, never mutated)
+_ENTITY_TEMPLATE = {
+    "days": None,
+    "leave_type": None,
+    "start_date": None,
+    "end_date": None,
+    "department": None,
+    "role": None,
+    "location": None,
+    "name": None,
+    "employee_id": None,
+    "job_family": None
+}
+_VALID_CATEGORIES = frozenset(("query", "action", "conversational", "invalid"))
+_VALID_MODULES = frozenset(("M1", "M2", "M3"))
+
+# Load intent classification prompt; the system message is identical every call,
+# so build it once (a stable prefix also lets Azure's prompt cache hit)
 intent_prompt = load_prompt(INTENT_CLASSIFICATION_PROMPT_PATH)
+INTENT_SYSTEM_MSG = SystemMessage(content=intent_prompt)
+
+# Recent classifications, keyed by normalized question + the history the LLM sees.
+# Repeat questions within the TTL skip the LLM round trip entirely.
+INTENT_CACHE_MAX_ENTRIES = 2048
+INTENT_CACHE_TTL_SECONDS = 60
+_HISTORY_CONTEXT = 3  # trailing history messages sent with each classification
+_intent_cache: "TTLCache[Tuple[str, Tuple[str, ...]], Dict[str, Any]]" = TTLCache(
+    maxsize=INTENT_CACHE_MAX_ENTRIES, ttl=INTENT_CACHE_TTL_SECONDS
+)
+
+
+def _intent_cache_key(question: str, conversation_history: Optional[list]) -> Tuple[str, Tuple[str, ...]]:
+    recent = conversation_history[-_HISTORY_CONTEXT:] if conversation_history else ()
+    return " ".join(question.lower().split()), tuple(m.content for m in recent)
+
+
+def _copy_intent(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a cached classification, including its nested lists/dicts (entities may nest)."""
+    return copy.deepcopy(result)
+
 
 # Initialize LLM for intent classification
 intent_llm = AzureChatOpenAI(
     model=CHAT_MODEL,
     api_version=AZURE_OPENAI_API_VERSION,
     temperature=0.1,  # Lower temperature for more consistent classification
+    http_async_client=shared_async_http_client,
 )
 
 
@@ -33,14 +82,19 @@ async def classify_intent(question: str, conversation_history: Optional[list] =
         Dictionary with intent, category, module, use_case, answer, confidence, 
         requires_context, and entities
     """
+    cache_key = _intent_cache_key(question, conversation_history)
+    cached = _intent_cache.get(cache_key)
+    if cached is not None:
+        # Fresh copies per caller, so a caller mutating its result can't corrupt the cache
+        return _copy_intent(cached)
+
     # Build messages
-    messages = [SystemMessage(content=intent_prompt)]
+    messages = [INTENT_SYSTEM_MSG]
     
     # Add conversation history if available (last 3 messages for context)
     if conversation_history:
         # Include last few messages for context
-        context_messages = conversation_history[-3:] if len(conversation_history) > 3 else conversation_history
-        messages.extend(context_messages)
+        messages.extend(conversation_history[-_HISTORY_CONTEXT:])
     
     # Add current question
     messages.append(HumanMessage(content=f"Classify this user input:\n\n{question}"))
@@ -52,27 +106,23 @@ async def classify_intent(question: str, conversation_history: Optional[list] =
         # Parse JSON from response content
         content = response.content
         
-        # Try to extract JSON if wrapped in markdown code blocks
-        if "```json" in content:
-            json_start = content.find("```json") + 7
-            json_end = content.find("```", json_start)
-            content = content[json_start:json_end].strip()
-        elif "```" in content:
-            json_start = content.find("```") + 3
-            json_end = content.find("```", json_start)
-            content = content[json_start:json_end].strip()
+        # Extract JSON (fenced or bare) in a single regex pass
+        m = _JSON_BLOCK_RE.search(content)
+        payload = (m.group(1) or m.group(2)) if m else content
         
         # Parse JSON
-        result = json.loads(content)
+        result = orjson.loads(payload)
         
         # Validate and normalize response structure
         normalized = normalize_intent_response(result)
         
-        return normalized
+        # Only successful classifications are cached; errors are retried next time
+        _intent_cache[cache_key] = normalized
+        return _copy_intent(normalized)
         
-    except json.JSONDecodeError as e:
-        print(f"JSON parsing error: {e}")
-        print(f"Response content: {response.content}")
+    except orjson.JSONDecodeError as e:
+        logger.warning("JSON parsing error: %s", e)
+        logger.debug("Response content: %s", response.content)
         # Return default invalid response
         return {
             "intent": "invalid",
@@ -85,7 +135,7 @@ async def classify_intent(question: str, conversation_history: Optional[list] =
             "entities": {}
         }
     except Exception as e:
-        print(f"Intent classification error: {e}")
+        logger.error("Intent classification error: %s", e)
         return {
             "intent": "invalid",
             "category": "invalid",
@@ -103,23 +153,9 @@ def normalize_intent_response(result: Dict[str, Any]) -> Dict[str, Any]:
     Normalize and validate intent classification response.
     Ensures all required fields are present with correct types.
     """
-    # Default entity structure
-    default_entities = {
-        "days": None,
-        "leave_type": None,
-        "start_date": None,
-        "end_date": None,
-        "department": None,
-        "role": None,
-        "location": None,
-        "name": None,
-        "employee_id": None,
-        "job_family": None
-    }
-    
-    # Merge provided entities with defaults
-    entities = result.get("entities", {})
-    normalized_entities = {**default_entities, **entities}
+    # Copy the default entity structure and overlay provided entities
+    normalized_entities = _ENTITY_TEMPLATE.copy()
+    normalized_entities.update(result.get("entities") or ())
     
     # Ensure confidence is a float between 0 and 1
     confidence = result.get("confidence", 0.5)
@@ -132,12 +168,12 @@ def normalize_intent_response(result: Dict[str, Any]) -> Dict[str, Any]:
     
     # Normalize category to lowercase
     category = result.get("category", "invalid").lower()
-    if category not in ["query", "action", "conversational", "invalid"]:
+    if category not in _VALID_CATEGORIES:
         category = "invalid"
     
     # Normalize module
     module = result.get("module")
-    if module and module not in ["M1", "M2", "M3"]:
+    if module and module not in _VALID_MODULES:
         module = None
     
     # Build normalized response
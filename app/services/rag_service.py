@@ -3,15 +3,131 @@ RAG Service
 Business logic for RAG processing with intent classification routing.
 Includes summarization and audit trail storage for non-invalid queries.
 """
+import re
 import time
+import uuid
 import asyncio
-from typing import Dict, Any, Optional, List
-from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+import hashlib
+import logging
+from typing import AsyncIterator, Awaitable, Dict, Any, Optional, List, Tuple, TypeVar
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
 from app.services.intent_service import classify_intent
 from app.services.summarization_service import generate_summary
-from app.services.blob_storage_service import store_interaction
-from app.config.settings import SUMMARY_MAX_WORDS
+from app.services.blob_storage_service import enqueue_interaction
+from app.config.settings import SUMMARY_MAX_WORDS, SEMANTIC_CACHE_ENABLED
 from app.agents.rag_agent import rag_agent
+from app.tools.handbook_tool import handbook_retriever_tool
+from app.tools.employee_tool import employee_data_sql_tool
+from app.repositories.handbook_repository import embeddings
+from app.cache.semantic_cache import semantic_cache
+from app.utils.background_tasks import run_in_background
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RAG_ERROR_ANSWER = "I encountered an error retrieving information. Please try again."
+
+# Pure greetings / thanks / goodbyes: answered without any LLM call
+_SMALL_TALK_RE = re.compile(
+    r"(?:(?P<greeting>hi|hello|hey|good (?:morning|afternoon|evening))"
+    r"|(?P<thanks>thanks|thank you|thx)"
+    r"|(?P<farewell>bye|goodbye))"
+    r"(?: there)?[\s!.,]*",
+    re.I,
+)
+_SMALL_TALK_ANSWERS = {
+    "greeting": "Hello! How can I help you with HR-related questions today?",
+    "thanks": "You're welcome! Is there anything else I can help you with?",
+    "farewell": "Goodbye! Feel free to come back if you have more HR questions.",
+}
+
+# Only these categories produce answers that are safe to replay for a similar question
+_CACHEABLE_CATEGORIES = frozenset(("conversational", "query"))
+# ...unless the answer was built from employee records: "leave for John Tan" and
+# "leave for John Lim" are near-identical questions with different personal answers
+_UNCACHEABLE_TOOLS = frozenset((employee_data_sql_tool.name,))
+
+
+def _cache_scope(conversation_history: Optional[List[BaseMessage]]) -> str:
+    """
+    Personalization key for the semantic cache.
+    Fresh questions share one global scope; follow-ups depend on the conversation,
+    so they are scoped to a digest of the history the agent will see (already capped
+    at SESSION_MAX_MESSAGES). Its length alone stops changing once the cap is reached.
+    """
+    if not conversation_history:
+        return ""
+    digest = hashlib.blake2b(digest_size=16)
+    for message in conversation_history:
+        digest.update(message.type.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(str(message.content).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+async def _prefetched_handbook_messages(prefetch: Awaitable[str], question: str) -> List[BaseMessage]:
+    """
+    Turn the speculative handbook lookup into a completed tool round-trip
+    (AIMessage tool call + ToolMessage result) so the agent's first LLM call can
+    answer straight away instead of spending a turn deciding to search.
+    Returns [] if the lookup failed; the agent then retrieves on its own.
+    """
+    try:
+        docs = await prefetch
+    except Exception as e:
+        logger.warning("Handbook prefetch failed, falling back to agent retrieval: %s", e)
+        return []
+
+    # OpenAI/Azure reject tool_call ids over 40 chars; this is 29
+    tool_call_id = f"call_{uuid.uuid4().hex[:24]}"
+    return [
+        AIMessage(
+            content="",
+            tool_calls=[{
+                "name": handbook_retriever_tool.name,
+                "args": {"query": question},
+                "id": tool_call_id,
+            }],
+        ),
+        ToolMessage(tool_call_id=tool_call_id, name=handbook_retriever_tool.name, content=str(docs)),
+    ]
+
+
+def _response(
+    intent: Optional[str],
+    category: str,
+    answer: Optional[str],
+    confidence: float,
+    module: Optional[str] = None,
+    use_case: Optional[str] = None,
+    requires_context: Optional[List[str]] = None,
+    entities: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Response dict matching the /ask schema. Every branch builds it here, so the
+    key layout is fixed in one constant-key literal and empty lists/dicts are
+    only allocated when a field is actually empty.
+    """
+    return {
+        "intent": intent,
+        "category": category,
+        "module": module,
+        "use_case": use_case,
+        "answer": answer,
+        "confidence": confidence,
+        "requires_context": requires_context if requires_context is not None else [],
+        "entities": entities if entities is not None else {},
+    }
+
+
+def _small_talk_response(question: str) -> Optional[Dict[str, Any]]:
+    """Canned conversational response for trivial small talk, or None."""
+    m = _SMALL_TALK_RE.fullmatch(question.strip())
+    if m is None:
+        return None
+    return _response("conversational", "conversational", _SMALL_TALK_ANSWERS[m.lastgroup], 1.0)
 
 
 async def process_with_intent_classification(
@@ -19,9 +135,225 @@ async def process_with_intent_classification(
     conversation_history: Optional[List[BaseMessage]] = None,
     session_id: Optional[str] = None
 ) -> Dict[str, Any]:
+    """
+    Process user question, serving near-duplicate questions from the semantic cache.
+    See _process_uncached for arguments and the response schema.
+    """
+    # Greetings/thanks skip classification (and the cache embedding) entirely
+    small_talk = _small_talk_response(question)
+    if small_talk is not None:
+        return small_talk
+
+    if not SEMANTIC_CACHE_ENABLED:
+        result, _ = await _process_uncached(question, conversation_history, session_id)
+        return result
+
+    scope = _cache_scope(conversation_history)
+    try:
+        query_vector = await embeddings.aembed_query(question)
+    except Exception as e:
+        logger.warning("Semantic cache embedding failed, skipping cache: %s", e)
+        result, _ = await _process_uncached(question, conversation_history, session_id)
+        return result
+
+    cached = semantic_cache.lookup(query_vector, scope)
+    if cached is not None:
+        return cached
+
+    result, tools_used = await _process_uncached(question, conversation_history, session_id)
+
+    if (
+        result.get("category") in _CACHEABLE_CATEGORIES
+        and result.get("answer") not in (None, RAG_ERROR_ANSWER)
+        and not _UNCACHEABLE_TOOLS.intersection(tools_used or ())
+    ):
+        semantic_cache.insert(query_vector, result, scope)
+
+    return result
+
+
+def _needs_rag(intent_result: Dict[str, Any]) -> bool:
+    """True if the question is a confident query, i.e. it is answered by the RAG agent."""
+    return intent_result.get("category", "").lower() == "query" and intent_result.get("confidence", 0.0) >= 0.6
+
+
+async def _classify_with_speculation(
+    question: str,
+    conversation_history: Optional[List[BaseMessage]],
+    speculative: Awaitable[T]
+) -> Tuple[Dict[str, Any], "asyncio.Task[T]"]:
+    """
+    Classify intent while `speculative` (work only a query needs) runs alongside it
+    (most questions are policy queries, so its latency hides behind classification).
+    Returns the intent result and the speculative task; the task is already
+    cancelled if the question won't go through RAG.
+    """
+    task = asyncio.ensure_future(speculative)
+    # Mark failures as retrieved so an unused task doesn't log "exception never retrieved"
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    try:
+        intent_result = await classify_intent(question, conversation_history)
+    except BaseException:
+        task.cancel()
+        raise
+
+    if not _needs_rag(intent_result):
+        # Answer doesn't need RAG; drop the speculative work
+        task.cancel()
+
+    return intent_result, task
+
+
+def _route_without_rag(
+    question: str,
+    intent_result: Dict[str, Any],
+    session_id: Optional[str],
+    start_time: float
+) -> Optional[Dict[str, Any]]:
+    """
+    Build the response for every outcome that doesn't need the RAG agent.
+    Returns None if the question is a confident query (i.e. RAG is required).
+    """
+    category = intent_result.get("category", "").lower()
+    confidence = intent_result.get("confidence", 0.0)
+    
+    # INVALID or low confidence: Return rejection (skip storage)
+    if category == "invalid" or confidence < 0.6:
+        return _response(
+            intent_result.get("intent", "invalid"),
+            "invalid",
+            intent_result.get("answer", "I can only assist with HR-related queries. Please rephrase your question."),
+            confidence,
+            module=intent_result.get("module"),
+            use_case=intent_result.get("use_case"),
+            entities=intent_result.get("entities"),
+        )
+    
+    # CONVERSATIONAL: Return pre-generated answer
+    if category == "conversational":
+        return _response(
+            intent_result.get("intent", "conversational"),
+            "conversational",
+            intent_result.get("answer", "Hello! How can I help you with HR-related questions today?"),
+            confidence,
+        )
+    
+    # ACTION: Return intent classification result (answer will be null, Gateway handles it)
+    if category == "action":
+        response_time_ms = (time.time() - start_time) * 1000
+        
+        # Store action interactions too (non-invalid)
+        if session_id:
+            enqueue_interaction(
+                session_id=session_id,
+                question=question,
+                intent_result=intent_result,
+                full_response="",  # No answer for actions
+                summary="",
+                summary_length=0,
+                tools_used=None,
+                response_time_ms=response_time_ms,
+            )
+        
+        return _response(
+            intent_result.get("intent"),
+            "action",
+            None,  # Gateway will handle action processing
+            confidence,
+            module=intent_result.get("module"),
+            use_case=intent_result.get("use_case"),
+            requires_context=intent_result.get("requires_context"),
+            entities=intent_result.get("entities"),
+        )
+    
+    # QUERY: handled by the RAG agent
+    if category == "query":
+        return None
+    
+    # Fallback (should not reach here)
+    return _response(
+        intent_result.get("intent", "invalid"),
+        "invalid",
+        "I encountered an error processing your request. Please try again.",
+        0.0,
+    )
+
+
+async def _build_rag_messages(
+    question: str,
+    conversation_history: Optional[List[BaseMessage]],
+    prefetch: Awaitable[str]
+) -> List[BaseMessage]:
+    """Agent input: history, the current question, then the prefetched handbook results."""
+    # The agent still runs, so it can query employee data or search again if needed.
+    return [
+        *(conversation_history or ()),
+        HumanMessage(content=question),
+        *await _prefetched_handbook_messages(prefetch, question),
+    ]
+
+
+async def _run_rag_agent(
+    question: str,
+    conversation_history: Optional[List[BaseMessage]],
+    prefetch: Awaitable[str]
+) -> List[BaseMessage]:
+    """Full agent loop on top of the (speculative) handbook lookup; returns the final agent messages."""
+    rag_messages = await _build_rag_messages(question, conversation_history, prefetch)
+    rag_result = await rag_agent.ainvoke({"messages": rag_messages})
+    return rag_result["messages"]
+
+
+def _query_response(intent_result: Dict[str, Any], answer: Optional[str], confidence: float) -> Dict[str, Any]:
+    """Response for a query-category question."""
+    return _response(
+        intent_result.get("intent"),
+        "query",
+        answer,
+        confidence,
+        module=intent_result.get("module"),
+        use_case=intent_result.get("use_case"),
+        entities=intent_result.get("entities"),
+    )
+
+
+def _tools_used(messages: List[BaseMessage]) -> Optional[List[str]]:
+    """Names of the tools that ran during the agent loop (None if none)."""
+    tools_used = [msg.name for msg in messages if isinstance(msg, ToolMessage)]
+    return tools_used if tools_used else None
+
+
+async def _summarize_and_store(
+    session_id: str,
+    question: str,
+    intent_result: Dict[str, Any],
+    rag_answer: str,
+    tools_used: Optional[List[str]],
+    response_time_ms: float
+) -> None:
+    """Audit a streamed answer: summarize it and store it, off the response path."""
+    summary = await generate_summary(rag_answer, max_words=SUMMARY_MAX_WORDS)
+    enqueue_interaction(
+        session_id=session_id,
+        question=question,
+        intent_result=intent_result,
+        full_response=rag_answer,
+        summary=summary,
+        summary_length=SUMMARY_MAX_WORDS,
+        tools_used=tools_used,
+        response_time_ms=response_time_ms,
+    )
+
+
+async def _process_uncached(
+    question: str,
+    conversation_history: Optional[List[BaseMessage]] = None,
+    session_id: Optional[str] = None
+) -> Tuple[Dict[str, Any], Optional[List[str]]]:
     """
     Process user question with intent classification and conditional RAG.
-    Returns response matching schema.
+    Returns the response matching schema, and the names of the tools the RAG
+    agent ran (None if it didn't run or used none).
     
     Args:
         question: User's input question
@@ -29,7 +361,7 @@ async def process_with_intent_classification(
         session_id: Optional session ID for audit trail storage
     
     Returns:
-        Dictionary matching response schema:
+        (response, tools_used), the response dictionary matching schema:
         {
             "intent": str,
             "category": str,
@@ -44,147 +376,117 @@ async def process_with_intent_classification(
 
     start_time = time.time()
     
-    # Step 1: Intent Classification
-    intent_result = await classify_intent(question, conversation_history)
-    
-    category = intent_result.get("category", "").lower()
+    # Step 1: Intent Classification, with the handbook lookup started speculatively
+    # alongside it (cancelled below unless the question is a query). Only retrieval
+    # speculates: the agent's billed LLM/tool calls wait for a "query" verdict.
+    intent_result, prefetch = await _classify_with_speculation(
+        question, conversation_history, handbook_retriever_tool.ainvoke({"query": question})
+    )
     confidence = intent_result.get("confidence", 0.0)
     
     # Step 2: Category-Based Routing
+    response = _route_without_rag(question, intent_result, session_id, start_time)
+    if response is not None:
+        return response, None
     
-    # INVALID or low confidence: Return rejection (skip storage)
-    if category == "invalid" or confidence < 0.6:
-        return {
-            "intent": intent_result.get("intent", "invalid"),
-            "category": "invalid",
-            "module": intent_result.get("module"),
-            "use_case": intent_result.get("use_case"),
-            "answer": intent_result.get("answer", "I can only assist with HR-related queries. Please rephrase your question."),
-            "confidence": confidence,
-            "requires_context": [],
-            "entities": intent_result.get("entities", {})
-        }
-    
-    # CONVERSATIONAL: Return pre-generated answer
-    if category == "conversational":
-        return {
-            "intent": intent_result.get("intent", "conversational"),
-            "category": "conversational",
-            "module": None,
-            "use_case": None,
-            "answer": intent_result.get("answer", "Hello! How can I help you with HR-related questions today?"),
-            "confidence": confidence,
-            "requires_context": [],
-            "entities": {}
-        }
-    
-    # ACTION: Return intent classification result (answer will be null, Gateway handles it)
-    if category == "action":
-        response_time_ms = (time.time() - start_time) * 1000
+    # QUERY: Run the RAG agent on the prefetched handbook results
+    try:
+        rag_messages = await _run_rag_agent(question, conversation_history, prefetch)
+        rag_answer = rag_messages[-1].content
+        tools_used = _tools_used(rag_messages)
         
-        # Store action interactions too (non-invalid)
+        # Generate concise summary for voice (this is the answer, so it stays on the response path)
+        summary = await generate_summary(rag_answer, max_words=SUMMARY_MAX_WORDS)
+        
+        # Queue interaction for a batched blob storage write (non-blocking);
+        # the audit-only fields are only computed when there is a trail to write
         if session_id:
-            asyncio.create_task(
-                store_interaction(
-                    session_id=session_id,
-                    question=question,
-                    intent_result=intent_result,
-                    full_response="",  # No answer for actions
-                    summary="",
-                    summary_length=0,
-                    tools_used=None,
-                    response_time_ms=response_time_ms,
-                )
+            enqueue_interaction(
+                session_id=session_id,
+                question=question,
+                intent_result=intent_result,
+                full_response=rag_answer,
+                summary=summary,
+                summary_length=SUMMARY_MAX_WORDS,
+                tools_used=tools_used,
+                response_time_ms=(time.time() - start_time) * 1000,
             )
         
-        return {
-            "intent": intent_result.get("intent"),
-            "category": "action",
-            "module": intent_result.get("module"),
-            "use_case": intent_result.get("use_case"),
-            "answer": None,  # Gateway will handle action processing
-            "confidence": confidence,
-            "requires_context": intent_result.get("requires_context", []),
-            "entities": intent_result.get("entities", {})
-        }
+        # Return summary for voice (full response stored in blob)
+        return _query_response(intent_result, summary, confidence), tools_used
+    except Exception as e:
+        logger.error("RAG error: %s", e)
+        # Fallback: return intent classification with error message
+        return _query_response(intent_result, RAG_ERROR_ANSWER, confidence * 0.5), None  # Reduce confidence due to error
+
+
+async def stream_with_intent_classification(
+    question: str,
+    conversation_history: Optional[List[BaseMessage]] = None,
+    session_id: Optional[str] = None
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streaming variant of process_with_intent_classification for text clients.
     
-    # QUERY: Use RAG to generate answer
-    if category == "query":
-        # Prepare messages for RAG
-        if conversation_history:
-            rag_messages = list(conversation_history)
-        else:
-            rag_messages = []
-        
-        # Add current question
-        rag_messages.append(HumanMessage(content=question))
+    Yields (event, data) pairs:
+        ("intent", {...})  classification result, sent before any answer text (query only)
+        ("token", {"text": str})  answer text as the LLM generates it (query only)
+        ("done", {...})  final response matching the /ask schema
+    
+    Query answers are the full agent answer rather than the voice summary; the
+    summary is still produced for the audit trail, in the background.
+    The semantic cache is bypassed since it holds voice summaries.
+    """
+    small_talk = _small_talk_response(question)
+    if small_talk is not None:
+        yield "done", small_talk
+        return
+    
+    start_time = time.time()
+    
+    # Tokens can't be streamed before the intent is known, so only the handbook
+    # lookup runs speculatively here
+    intent_result, prefetch = await _classify_with_speculation(
+        question, conversation_history, handbook_retriever_tool.ainvoke({"query": question})
+    )
+    confidence = intent_result.get("confidence", 0.0)
+    
+    response = _route_without_rag(question, intent_result, session_id, start_time)
+    if response is not None:
+        yield "done", response
+        return
+    
+    yield "intent", _query_response(intent_result, None, confidence)
+    
+    rag_messages = await _build_rag_messages(question, conversation_history, prefetch)
+    final_messages: Optional[List[BaseMessage]] = None
+    try:
+        async for event in rag_agent.astream_events({"messages": rag_messages}, version="v2"):
+            kind = event["event"]
+            if kind == "on_chat_model_stream":
+                text = event["data"]["chunk"].content
+                if text:
+                    yield "token", {"text": text}
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                # Root graph finished: its output is the final agent state
+                final_messages = event["data"]["output"]["messages"]
         
-        # Run RAG agent asynchronously
-        try:
-            rag_result = await rag_agent.ainvoke({"messages": rag_messages})
-            rag_answer = rag_result["messages"][-1].content
-            
-            # Extract tools used from RAG messages
-            tools_used = []
-            for msg in rag_result["messages"]:
-                if isinstance(msg, ToolMessage):
-                    tools_used.append(msg.name)
-            
-            # Generate concise summary for voice
-            summary = await generate_summary(rag_answer, max_words=SUMMARY_MAX_WORDS)
-            
-            # Calculate response time
-            response_time_ms = (time.time() - start_time) * 1000
-            
-            # Store interaction to blob storage (async, non-blocking)
-            # Only store if session_id is provided and category is not invalid
-            if session_id and category != "invalid":
-                asyncio.create_task(
-                    store_interaction(
-                        session_id=session_id,
-                        question=question,
-                        intent_result=intent_result,
-                        full_response=rag_answer,
-                        summary=summary,
-                        summary_length=SUMMARY_MAX_WORDS,
-                        tools_used=tools_used if tools_used else None,
-                        response_time_ms=response_time_ms,
-                    )
-                )
-            
-            # Return summary for voice (full response stored in blob)
-            return {
-                "intent": intent_result.get("intent"),
-                "category": "query",
-                "module": intent_result.get("module"),
-                "use_case": intent_result.get("use_case"),
-                "answer": summary,
-                "confidence": confidence,
-                "requires_context": [],
-                "entities": intent_result.get("entities", {})
-            }
-        except Exception as e:
-            print(f"RAG error: {e}")
-            # Fallback: return intent classification with error message
-            return {
-                "intent": intent_result.get("intent"),
-                "category": "query",
-                "module": intent_result.get("module"),
-                "use_case": intent_result.get("use_case"),
-                "answer": "I encountered an error retrieving information. Please try again.",
-                "confidence": confidence * 0.5,  # Reduce confidence due to error
-                "requires_context": [],
-                "entities": intent_result.get("entities", {})
-            }
+        rag_answer = final_messages[-1].content
+    except Exception as e:
+        logger.error("RAG error: %s", e)
+        yield "done", _query_response(intent_result, RAG_ERROR_ANSWER, confidence * 0.5)
+        return
     
-    # Fallback (should not reach here)
-    return {
-        "intent": intent_result.get("intent", "invalid"),
-        "category": "invalid",
-        "module": None,
-        "use_case": None,
-        "answer": "I encountered an error processing your request. Please try again.",
-        "confidence": 0.0,
-        "requires_context": [],
-        "entities": {}
-    }
\ No newline at end of file
+    if session_id:
+        run_in_background(
+            _summarize_and_store(
+                session_id=session_id,
+                question=question,
+                intent_result=intent_result,
+                rag_answer=rag_answer,
+                tools_used=_tools_used(final_messages),
+                response_time_ms=(time.time() - start_time) * 1000,
+            )
+        )
+    
+    yield "done", _query_response(intent_result, rag_answer, confidence)
@@ -1,34 +1,76 @@
 """
 Session Service
 Manages conversation history and session state.
+The API is async so a networked store can back it without blocking the event loop.
+
+Storage:
+- REDIS_URL set: each session is a Redis list of JSON-serialized messages, capped at
+  SESSION_MAX_MESSAGES and expiring SESSION_TTL_SECONDS after the last update, so any
+  uvicorn worker can serve any request.
+- Otherwise: in-process dict of bounded deques (single worker only), also capped
+  at SESSION_MAX_MESSAGES per session.
 """
-from typing import Dict, List, Optional
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from collections import deque
+from typing import Deque, Dict, List, Optional
+import orjson
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, message_to_dict, messages_from_dict
+from app.config.settings import REDIS_URL, SESSION_TTL_SECONDS, SESSION_MAX_MESSAGES
+
+_KEY_PREFIX = "hr-assistant:session:"
+
+# Redis client when configured (connection pool is created lazily on first command).
+# Short timeouts keep a slow Redis from stalling /ask; the pool is bounded per worker.
+if REDIS_URL:
+    import redis.asyncio as redis
+    _redis: Optional["redis.Redis"] = redis.Redis.from_url(
+        REDIS_URL,
+        max_connections=64,
+        socket_connect_timeout=2,
+        socket_timeout=2,
+        health_check_interval=30,
+    )
+else:
+    _redis = None
+
+# In-memory session storage (used when Redis is not configured).
+# maxlen drops the oldest messages in O(1), so per-session memory stays bounded.
+_sessions: Dict[str, Deque[BaseMessage]] = {}
+
+
+def _session_key(session_id: str) -> str:
+    return f"{_KEY_PREFIX}{session_id}"
+
 
-# In-memory session storage (replace with Redis/database in production)
-_sessions: Dict[str, List[BaseMessage]] = {}
+def _dump_message(message: BaseMessage) -> bytes:
+    return orjson.dumps(message_to_dict(message))
 
 
-def get_session_history(session_id: Optional[str]) -> List[BaseMessage]:
+async def get_session_history(session_id: Optional[str]) -> List[BaseMessage]:
     """
     Get conversation history for a session.
-    
+
     Args:
         session_id: Optional session identifier
-        
+
     Returns:
         List of messages in the conversation history
     """
     if not session_id:
         return []
-    
-    return _sessions.get(session_id, [])
+
+    if _redis is not None:
+        raw = await _redis.lrange(_session_key(session_id), 0, -1)
+        return messages_from_dict([orjson.loads(item) for item in raw])
+
+    history = _sessions.get(session_id)
+    # Snapshot (at most SESSION_MAX_MESSAGES) so callers never see a deque mutated mid-request
+    return list(history) if history else []
 
 
-def add_to_session(session_id: Optional[str], user_message: str, ai_message: str) -> None:
+async def add_to_session(session_id: Optional[str], user_message: str, ai_message: str) -> None:
     """
     Add a user message and AI response to the session history.
-    
+
     Args:
         session_id: Optional session identifier
         user_message: User's input message
@@ -36,25 +78,61 @@ def add_to_session(session_id: Optional[str], user_message: str, ai_message: str
     """
     if not session_id:
         return
-    
-    if session_id not in _sessions:
-        _sessions[session_id] = []
-    
-    _sessions[session_id].append(HumanMessage(content=user_message))
-    _sessions[session_id].append(AIMessage(content=ai_message))
 
+    if _redis is not None:
+        key = _session_key(session_id)
+        # Append, cap and refresh the TTL in one round-trip
+        async with _redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(
+                key,
+                _dump_message(HumanMessage(content=user_message)),
+                _dump_message(AIMessage(content=ai_message)),
+            )
+            pipe.ltrim(key, -SESSION_MAX_MESSAGES, -1)
+            pipe.expire(key, SESSION_TTL_SECONDS)
+            await pipe.execute()
+        return
+
+    history = _sessions.setdefault(session_id, deque(maxlen=SESSION_MAX_MESSAGES))
+    history.append(HumanMessage(content=user_message))
+    history.append(AIMessage(content=ai_message))
 
-def clear_session(session_id: Optional[str]) -> None:
+
+async def clear_session(session_id: Optional[str]) -> None:
     """
     Clear conversation history for a session.
-    
+
     Args:
         session_id: Optional session identifier
     """
-    if session_id and session_id in _sessions:
-        _sessions[session_id] = []
+    if not session_id:
+        return
+
+    if _redis is not None:
+        await _redis.delete(_session_key(session_id))
+        return
+
+    _sessions.pop(session_id, None)
 
 
-def clear_all_sessions() -> None:
+async def clear_all_sessions() -> None:
     """Clear all session histories."""
-    _sessions.clear()
\ No newline at end of file
+    if _redis is not None:
+        # SCAN (not KEYS) so a large keyspace doesn't block the Redis server
+        async for key in _redis.scan_iter(match=f"{_KEY_PREFIX}*", count=500):
+            await _redis.delete(key)
+        return
+
+    _sessions.clear()
+
+
+async def open_session_store() -> None:
+    """Open a Redis connection at startup so the first request doesn't pay for it."""
+    if _redis is not None:
+        await _redis.ping()
+
+
+async def close_session_store() -> None:
+    """Release the Redis connection pool (called on application shutdown)."""
+    if _redis is not None:
+        await _redis.aclose()
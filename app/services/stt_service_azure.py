@@ -3,6 +3,7 @@ Speech-to-Text Service (Azure Speech SDK)
 Handles audio transcription using Azure Speech SDK.
 """
 import os
+import threading
 from dotenv import load_dotenv
 import azure.cognitiveservices.speech as speechsdk
 from app.config.settings import AZURE_SPEECH_KEY, AZURE_SPEECH_REGION
@@ -18,6 +19,37 @@ speech_config = speechsdk.SpeechConfig(
 # Force English (adjust to en-SG or en-US as you prefer)
 speech_config.speech_recognition_language = "en-SG"
 
+# Recognizer (and its microphone + service connection) reused across utterances,
+# created on first use
+_recognizer = None
+_recognizer_lock = threading.Lock()
+
+
+def _get_recognizer() -> "speechsdk.SpeechRecognizer":
+    """Shared SpeechRecognizer on the default microphone, with its connection opened up front."""
+    global _recognizer
+    with _recognizer_lock:
+        if _recognizer is None:
+            audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
+            recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_config)
+            # Pre-connect so the first utterance doesn't pay for the websocket handshake;
+            # False = single-shot mode, matching recognize_once() (True would force a reconnect)
+            speechsdk.Connection.from_recognizer(recognizer).open(False)
+            _recognizer = recognizer
+        return _recognizer
+
+
+def _reset_recognizer() -> None:
+    """Drop the shared recognizer (after a failure) so the next call reconnects."""
+    global _recognizer
+    with _recognizer_lock:
+        _recognizer = None
+
+
+def warmup() -> None:
+    """Create the shared recognizer and open its connection before the first utterance."""
+    _get_recognizer()
+
 
 def transcribe_from_mic(timeout_seconds: int = 8) -> str:
     """
@@ -30,15 +62,19 @@ def transcribe_from_mic(timeout_seconds: int = 8) -> str:
     Returns:
         Transcribed text, or empty string if no speech detected
     """
-    audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
-    recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_config)
-
     try:
+        recognizer = _get_recognizer()
+        # Give up on a silent mic after timeout_seconds (applied when recognition starts)
+        recognizer.properties.set_property(
+            speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs,
+            str(timeout_seconds * 1000),
+        )
         print("Listening (speak now)...")
         # recognize_once_async listens until it detects end of utterance or timeout
         result = recognizer.recognize_once()
     except Exception as e:
         print("STT error / timeout:", e)
+        _reset_recognizer()
         return ""
 
     if result is None:
@@ -53,5 +89,6 @@ def transcribe_from_mic(timeout_seconds: int = 8) -> str:
     else:
         # canceled or error
         print("Recognition canceled/failed:", result.reason)
+        _reset_recognizer()
         return ""
 
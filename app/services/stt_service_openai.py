@@ -3,17 +3,26 @@ Speech-to-Text Service (OpenAI)
 Handles audio transcription using OpenAI Whisper via Azure OpenAI.
 Includes hot mic recording with VAD.
 """
+import io
 import os
-import tempfile
-import wave
-import time
+import atexit
+import shutil
+import struct
+import subprocess
+import numpy as np
 import webrtcvad
-import collections
 from dotenv import load_dotenv
 from openai import AzureOpenAI
 
 load_dotenv()
 
+# Optional neural VAD (Silero, ONNX): used when onnxruntime is installed and
+# SILERO_VAD_MODEL points at silero_vad.onnx; webrtcvad otherwise
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
 # OpenAI STT Client
 stt_client = AzureOpenAI(api_version=os.environ["AZURE_OPENAI_API_VERSION"])
 
@@ -23,6 +32,83 @@ CHANNELS = 1
 FRAME_DURATION = 30  # ms
 FRAME_SIZE = int(RATE * FRAME_DURATION / 1000)  # samples per frame
 VAD = webrtcvad.Vad(2)  # 0=least aggressive, 3=most aggressive
+# Utterance state machine (in 30 ms frames): SILENCE -> SPEECH after START_FRAMES
+# consecutive voiced frames, SPEECH -> done after END_FRAMES consecutive silent
+# frames, once the utterance is at least MIN_UTTERANCE_FRAMES long
+START_FRAMES = 8  # 240 ms
+END_FRAMES = 10  # 300 ms
+MIN_UTTERANCE_FRAMES = 20  # 600 ms
+# VAD frames fetched per PortAudio read (150 ms): fewer C/Python crossings, while
+# end-of-speech detection is delayed by at most one read
+READ_FRAMES = 5
+_FRAME_BYTES = FRAME_SIZE * 2  # 16-bit mono
+# Frames quieter than this RMS (int16 units) are silence without asking the VAD
+ENERGY_FLOOR_RMS = 100
+_ENERGY_FLOOR_SUM = float(ENERGY_FLOOR_RMS ** 2 * FRAME_SIZE)  # same floor on sum of squares
+
+# Optional Opus upload: set STT_OPUS_BITRATE (e.g. 48k) to compress the WAV with ffmpeg
+# before sending (~6-8x smaller; worth it on slow uplinks, not on a LAN)
+STT_OPUS_BITRATE = os.getenv("STT_OPUS_BITRATE")
+_FFMPEG = shutil.which("ffmpeg") if STT_OPUS_BITRATE else None
+
+# Canonical 44-byte RIFF/WAVE header for 16-bit mono PCM at RATE
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+
+def _pack_wav_header(buf: io.BytesIO) -> None:
+    """Fill the header placeholder at the start of buf, sized for the PCM that follows it."""
+    data_size = buf.tell() - _WAV_HEADER.size
+    _WAV_HEADER.pack_into(
+        buf.getbuffer(), 0,
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, CHANNELS, RATE, RATE * CHANNELS * 2, CHANNELS * 2, 16,
+        b"data", data_size,
+    )
+
+
+class _SileroVad:
+    """
+    Silero VAD over 512-sample windows (the model's native size at 16 kHz), with
+    hysteresis on the speech probability. Windows of one stream are run one at a
+    time: the model is recurrent, so its state has to carry from window to window.
+    """
+    WINDOW = 512
+    START_PROB = 0.5  # enter speech at or above this probability
+    END_PROB = 0.35  # ...and stay in speech until it drops below this one
+
+    def __init__(self, model_path: str):
+        self._session = onnxruntime.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        # v5 models carry one "state" tensor; v4 models carry "h" and "c"
+        self._v5 = "state" in {i.name for i in self._session.get_inputs()}
+        self._sr = np.array(RATE, dtype=np.int64)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the previous utterance (call before each recording)."""
+        if self._v5:
+            self._state = {"state": np.zeros((2, 1, 128), dtype=np.float32)}
+        else:
+            self._state = {"h": np.zeros((2, 1, 64), dtype=np.float32), "c": np.zeros((2, 1, 64), dtype=np.float32)}
+        self._pending = np.empty(0, dtype=np.float32)
+        self._speaking = False
+
+    def is_speech(self, samples: "np.ndarray") -> bool:
+        """Feed one frame of int16-range samples; returns the current speech decision."""
+        self._pending = np.concatenate((self._pending, samples * (1.0 / 32768.0)))
+        while len(self._pending) >= self.WINDOW:
+            window, self._pending = self._pending[:self.WINDOW], self._pending[self.WINDOW:]
+            out = self._session.run(None, {"input": window[np.newaxis, :], "sr": self._sr, **self._state})
+            if self._v5:
+                self._state = {"state": out[1]}
+            else:
+                self._state = {"h": out[1], "c": out[2]}
+            prob = out[0].item()
+            self._speaking = prob >= self.START_PROB or (self._speaking and prob >= self.END_PROB)
+        return self._speaking
+
+
+SILERO_VAD_MODEL = os.getenv("SILERO_VAD_MODEL")
+SILERO_VAD = _SileroVad(SILERO_VAD_MODEL) if SILERO_VAD_MODEL and onnxruntime is not None else None
 
 
 def is_speech(frame_bytes) -> bool:
@@ -30,87 +116,158 @@ def is_speech(frame_bytes) -> bool:
     return VAD.is_speech(frame_bytes, RATE)
 
 
-def record_hot_mic() -> str:
+# Microphone stream, opened on first use and kept across utterances: between
+# recordings it is only stopped, so the next call skips PortAudio init/device open.
+_pa = None
+_stream = None
+
+
+def _mic_stream():
+    """Shared PyAudio input stream (opened lazily, started for a new recording)."""
+    global _pa, _stream
+    import pyaudio
+
+    if _stream is None:
+        _pa = pyaudio.PyAudio()
+        _stream = _pa.open(
+            format=pyaudio.paInt16,
+            channels=CHANNELS,
+            rate=RATE,
+            input=True,
+            frames_per_buffer=FRAME_SIZE * READ_FRAMES,
+            start=False,
+        )
+        atexit.register(close_hot_mic)
+    _stream.start_stream()
+    return _stream
+
+
+def close_hot_mic() -> None:
+    """Close the shared microphone stream and release PortAudio."""
+    global _pa, _stream
+    if _stream is not None:
+        _stream.close()
+        _pa.terminate()
+        _pa = _stream = None
+
+
+def _vad_frames(stream):
+    """Yield 30 ms frames, sliced out of larger PortAudio reads."""
+    read = stream.read
+    while True:
+        chunk = read(FRAME_SIZE * READ_FRAMES, exception_on_overflow=False)
+        for offset in range(0, len(chunk), _FRAME_BYTES):
+            yield chunk[offset:offset + _FRAME_BYTES]
+
+
+def record_hot_mic() -> io.BytesIO:
     """
     Continuously listens, detects voice activity,
-    records until silence, and returns a WAV temp file path.
+    records until silence, and returns the utterance as an in-memory WAV file.
     Uses PyAudio and WebRTC VAD.
     """
-    import pyaudio
-    
     print("🎤 Hot mic listening... start speaking!")
 
-    pa = pyaudio.PyAudio()
-    stream = pa.open(
-        format=pyaudio.paInt16,
-        channels=CHANNELS,
-        rate=RATE,
-        input=True,
-        frames_per_buffer=FRAME_SIZE,
-    )
+    stream = _mic_stream()
 
-    # ring buffers for smooth detection
-    voiced_frames = []
-    ring_buffer = collections.deque(maxlen=10)
+    vad_is_speech = VAD.is_speech
+    silero = SILERO_VAD
+    if silero is not None:
+        silero.reset()
 
-    speaking = False
-    start_time = None
+    audio = None  # WAV header placeholder + PCM; None while in SILENCE
+    onset = []  # current run of voiced frames while in SILENCE (kept as pre-roll)
+    silent_run = 0
+    utterance_frames = 0
 
-    while True:
-        frame = stream.read(FRAME_SIZE, exception_on_overflow=False)
+    try:
+        for frame in _vad_frames(stream):
+            samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+            loud = samples.dot(samples) >= _ENERGY_FLOOR_SUM
+            if silero is not None:
+                # Silero is recurrent: it sees every frame (quiet ones included) so its
+                # state tracks the stream; the energy gate only vetoes its decision
+                voiced = silero.is_speech(samples) and loud
+            else:
+                # Cheap energy gate first; silence (the common case) skips the VAD call
+                voiced = loud and vad_is_speech(frame, RATE)
 
-        if is_speech(frame):
-            ring_buffer.append(True)
-        else:
-            ring_buffer.append(False)
+            if audio is None:
+                # SILENCE: wait for a sustained run of speech
+                if not voiced:
+                    onset.clear()
+                    continue
+                onset.append(frame)
+                if len(onset) < START_FRAMES:
+                    continue
 
-        # Speech START detected
-        if not speaking and sum(ring_buffer) > 7:
-            speaking = True
-            start_time = time.time()
-            print("🟢 Speech detected. Recording...")
-            voiced_frames = []
+                # Speech START detected: keep the onset so the first syllable isn't clipped
+                print("🟢 Speech detected. Recording...")
+                audio = io.BytesIO()
+                audio.write(bytes(_WAV_HEADER.size))
+                for onset_frame in onset:
+                    audio.write(onset_frame)
+                utterance_frames = len(onset)
+                continue
 
-        # Capture frames while speaking
-        if speaking:
-            voiced_frames.append(frame)
+            # SPEECH: capture frames until a sustained silence
+            audio.write(frame)
+            utterance_frames += 1
+            silent_run = 0 if voiced else silent_run + 1
 
-            # Silence END detected
-            if sum(ring_buffer) < 2 and (time.time() - start_time) > 0.6:
+            # Silence END detected (audio time, so chunked reads don't skew it)
+            if silent_run >= END_FRAMES and utterance_frames >= MIN_UTTERANCE_FRAMES:
                 print("🔴 Silence detected. Stopped recording.")
                 break
+    finally:
+        stream.stop_stream()
 
-    stream.stop_stream()
-    stream.close()
-    pa.terminate()
+    # Header written in place, then the buffer itself is uploaded (no copy of the audio)
+    _pack_wav_header(audio)
+    audio.seek(0)
+    return audio
 
-    # Save to temp wav
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-    with wave.open(temp_file.name, "wb") as wf:
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(2)  # 16-bit
-        wf.setframerate(RATE)
-        wf.writeframes(b"".join(voiced_frames))
 
-    return temp_file.name
+def _encode_opus(audio: "io.BytesIO | bytes") -> "bytes | None":
+    """WAV -> Ogg/Opus via ffmpeg pipes (no temp files); None on failure (the WAV is sent instead)."""
+    wav = audio.getbuffer() if isinstance(audio, io.BytesIO) else audio
+    try:
+        proc = subprocess.run(
+            [_FFMPEG, "-loglevel", "error", "-f", "wav", "-i", "pipe:0",
+             "-c:a", "libopus", "-b:a", STT_OPUS_BITRATE, "-application", "voip", "-f", "ogg", "pipe:1"],
+            input=wav,
+            capture_output=True,
+            check=True,
+            timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        print("Opus encoding failed, sending WAV:", e)
+        return None
+    finally:
+        if isinstance(wav, memoryview):
+            wav.release()  # let the BytesIO be read/resized again
+    return proc.stdout
 
 
-def transcribe_audio(file_path: str) -> str:
+def transcribe_audio(audio: "io.BytesIO | bytes") -> str:
     """
-    Transcribe audio file using OpenAI Whisper (Azure OpenAI).
+    Transcribe audio using OpenAI Whisper (Azure OpenAI).
     
     Args:
-        file_path: Path to audio file (WAV format)
+        audio: WAV audio, as a file object (as returned by record_hot_mic) or bytes
         
     Returns:
         Transcribed text
     """
-    with open(file_path, "rb") as f:
-        audio_bytes = f.read()
+    upload = ("speech.wav", audio, "audio/wav")
+    if _FFMPEG:
+        opus = _encode_opus(audio)
+        if opus is not None:
+            upload = ("speech.ogg", opus, "audio/ogg")
 
     resp = stt_client.audio.transcriptions.create(
         model=os.getenv("STT_MODEL"),
-        file=("speech.wav", audio_bytes, "audio/wav"),
+        file=upload,
         language="en",
         temperature=0.2,
     )
@@ -3,26 +3,69 @@ Summarization Service
 Generates concise summaries of RAG responses for voice interfaces.
 """
 import asyncio
+import hashlib
+import logging
+from functools import lru_cache
 from typing import Optional
+from cachetools import TTLCache
 from langchain_openai import AzureChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from app.config.settings import (
-    CHAT_MODEL,
+    SUMMARY_MODEL,
     AZURE_OPENAI_API_VERSION,
     SUMMARY_MAX_WORDS,
     SUMMARIZATION_PROMPT_PATH,
 )
 from app.utils.prompt_loader import load_prompt
+from app.utils.http_clients import shared_async_http_client
 
+logger = logging.getLogger(__name__)
+
+
+# Output token cap: ~1.3 tokens/word for English, with generous headroom since
+# "approximately N words" is a target, not a limit. It only stops runaway output;
+# a summary that hits it is discarded (see generate_summary).
+_TOKENS_PER_WORD = 2.5
+_TOKENS_SLACK = 32
 
 # Initialize LLM for summarization
 _summarization_llm = AzureChatOpenAI(
-    model=CHAT_MODEL,
+    model=SUMMARY_MODEL,
     api_version=AZURE_OPENAI_API_VERSION,
     temperature=0.3,  # Lower temperature for more consistent summaries
+    http_async_client=shared_async_http_client,
+)
+
+
+# FAQ-style answers repeat, so reuse their summaries instead of a second LLM call.
+# Keyed by a digest of the full text (not the text itself) to keep keys small.
+SUMMARY_CACHE_MAX_ENTRIES = 4096
+SUMMARY_CACHE_TTL_SECONDS = 3600
+_summary_cache: "TTLCache[str, str]" = TTLCache(
+    maxsize=SUMMARY_CACHE_MAX_ENTRIES, ttl=SUMMARY_CACHE_TTL_SECONDS
 )
 
 
+def _summary_cache_key(full_text: str, max_words: int) -> str:
+    digest = hashlib.blake2b(full_text.encode("utf-8"), digest_size=16).hexdigest()
+    return f"{digest}:{max_words}"
+
+
+# Load the summarization prompt at import, like the intent and agent prompts,
+# so a missing file fails at startup and no request pays for the disk read
+_summary_prompt_template = load_prompt(SUMMARIZATION_PROMPT_PATH)
+
+
+@lru_cache(maxsize=8)
+def _summary_system_message(max_words: int) -> SystemMessage:
+    """System message for a given word budget (built once per max_words)."""
+    return SystemMessage(content=_summary_prompt_template.format(max_words=max_words))
+
+
+# Pre-build the message for the default budget used by every RAG answer
+_summary_system_message(SUMMARY_MAX_WORDS)
+
+
 async def generate_summary(
     full_text: str, 
     max_words: Optional[int] = None
@@ -44,34 +87,48 @@ async def generate_summary(
     if max_words is None:
         max_words = SUMMARY_MAX_WORDS
     
-    # If text is already short, no need to summarize
-    word_count = len(full_text.split())
-    if word_count <= max_words:
+    # If text is already short, no need to summarize. Cheap bound first (every word
+    # but the first needs a whitespace char before it, so n words take 2n - 1 chars);
+    # the exact count uses str.split(), like the summary check below, so \r, NBSP and
+    # other Unicode whitespace separate words consistently.
+    if len(full_text) <= 2 * max_words:
+        return full_text
+    if len(full_text.split()) <= max_words:
         return full_text
     
-    # Load summarization prompt template and format with max_words
-    prompt_template = load_prompt(SUMMARIZATION_PROMPT_PATH)
-    system_prompt = prompt_template.format(max_words=max_words)
-    
+    cache_key = _summary_cache_key(full_text, max_words)
+    cached = _summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     user_prompt = f"Summarize the following text to approximately {max_words} words:\n\n{full_text}"
     
     try:
         messages = [
-            SystemMessage(content=system_prompt),
+            _summary_system_message(max_words),
             HumanMessage(content=user_prompt)
         ]
         
-        response = await _summarization_llm.ainvoke(messages)
+        # Cap output well above the word budget so the model can't run away
+        response = await _summarization_llm.ainvoke(
+            messages, max_tokens=int(max_words * _TOKENS_PER_WORD) + _TOKENS_SLACK
+        )
         summary = response.content.strip()
         
+        # Cut off mid-sentence by the cap: never speak or cache a truncated summary
+        if response.response_metadata.get("finish_reason") == "length":
+            logger.warning("Summary hit the %d-word token cap, returning full text", max_words)
+            return full_text
+        
         # Fallback to original if summary is suspiciously short or empty
         if not summary or len(summary.split()) < 10:
             return full_text
         
+        _summary_cache[cache_key] = summary
         return summary
         
     except Exception as e:
-        print(f"Summarization error: {e}")
+        logger.warning("Summarization error: %s", e)
         # Graceful fallback: return original text
         return full_text
 
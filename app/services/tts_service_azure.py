@@ -2,14 +2,13 @@
 Text-to-Speech Service (Azure Speech SDK)
 Handles text-to-speech synthesis using Azure Speech SDK.
 """
-import os
 import re
-import tempfile
-import time
+import queue
+import threading
+from typing import Optional
 from dotenv import load_dotenv
 import azure.cognitiveservices.speech as speechsdk
 import sounddevice as sd
-import soundfile as sf
 from app.config.settings import AZURE_SPEECH_KEY, AZURE_SPEECH_REGION
 
 load_dotenv()
@@ -23,6 +22,51 @@ speech_config = speechsdk.SpeechConfig(
 # Voice Options: en-SG-LunaNeural (Female Singlish), en-SG-WayneNeural (Male Singlish), en-US-JennyNeural (Female English)
 speech_config.speech_synthesis_voice_name = "en-US-JennyNeural"
 
+# Raw 16 kHz 16-bit mono PCM: voice-band quality at a third of the default format's
+# bytes, played straight to the sound device with no container or resampling
+SAMPLE_RATE = 16000
+speech_config.set_speech_synthesis_output_format(speechsdk.SpeechSynthesisOutputFormat.Raw16Khz16BitMonoPcm)
+_CHUNK_BYTES = SAMPLE_RATE * 2 // 10  # 100 ms of 16-bit mono audio
+_BLOCK_FRAMES = SAMPLE_RATE // 50  # 20 ms device blocks: how quickly an interruption is heard
+
+# Synthesizer (and its service connection) reused across utterances, created on
+# first use. The lock also serializes utterances so playback never overlaps.
+_synthesizer = None
+_synthesizer_lock = threading.Lock()
+# Set by stop_speaking() (e.g. when the user talks over the answer) to cut playback short.
+# Only resume_speaking() clears it, so a stop that lands before playback starts isn't lost.
+_interrupt = threading.Event()
+
+
+def _get_synthesizer() -> "speechsdk.SpeechSynthesizer":
+    """Shared SpeechSynthesizer with its connection opened up front (call with the lock held)."""
+    global _synthesizer
+    if _synthesizer is None:
+        # No audio_config: the SDK hands the audio back to us instead of a device/file
+        synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+        # Pre-connect so the first utterance doesn't pay for the websocket handshake
+        speechsdk.Connection.from_speech_synthesizer(synthesizer).open(True)
+        _synthesizer = synthesizer
+    return _synthesizer
+
+
+# Speech cleanup patterns (compiled once; applied in this order)
+_HEADER_RE = re.compile(r"#+\s*")
+_BULLET_RE = re.compile(r"[-•]\s*")
+_ORDINAL_RE = re.compile(r"\b(1st|2nd|3rd)\b", re.IGNORECASE)
+_ORDINAL_WORDS = {"1st": "first", "2nd": "second", "3rd": "third"}
+_NEWLINES_RE = re.compile(r"\n+")
+_DROP_CHARS = str.maketrans("", "", "*`)")  # bold/italic markers, code ticks, citation parens
+
+
+def _ordinal_word(m: "re.Match[str]") -> str:
+    return _ORDINAL_WORDS[m.group(1).lower()]
+
+
+def _newline_pause(m: "re.Match[str]") -> str:
+    # Paragraph breaks become sentence pauses, single line breaks short pauses
+    return ". " if len(m.group()) > 1 else ", "
+
 
 def prepare_text_for_speech(text: str) -> str:
     """
@@ -36,67 +80,128 @@ def prepare_text_for_speech(text: str) -> str:
         Cleaned text suitable for TTS
     """
     # Remove markdown headers ###, ##, #
-    text = re.sub(r"#+\s*", "", text)
+    text = _HEADER_RE.sub("", text)
 
     # Replace bullets
-    text = re.sub(r"[-•]\s*", " - ", text)
+    text = _BULLET_RE.sub(" - ", text)
 
-    # Replace "1st", "2nd", "3rd", "4th" etc.
-    text = re.sub(r"\b1st\b", "first", text, flags=re.IGNORECASE)
-    text = re.sub(r"\b2nd\b", "second", text, flags=re.IGNORECASE)
-    text = re.sub(r"\b3rd\b", "third", text, flags=re.IGNORECASE)
-    text = re.sub(r"\b(\d+)th\b", r"\1th", text)  # optional
+    # Replace "1st", "2nd", "3rd" in one pass
+    text = _ORDINAL_RE.sub(_ordinal_word, text)
 
-    # Remove bold/italic markdown
-    text = text.replace("**", "")
-    text = text.replace("*", "")
+    # Drop bold/italic markdown, code ticks and citation closing parentheses in one
+    # pass, then rewrite citation openers (markup first, so "(**see:**" matches too)
+    text = text.translate(_DROP_CHARS).replace("(see:", "See")
 
-    # Remove code ticks
-    text = text.replace("`", "")
+    # Convert newlines to pauses in one pass
+    text = _NEWLINES_RE.sub(_newline_pause, text)
 
-    # Remove excessive parentheses for citations
-    text = text.replace("(see:", "See")
-    text = text.replace(")", "")
+    return text.strip()
 
-    # Convert multiple newlines to pauses
-    text = re.sub(r"\n{2,}", ". ", text)
-    text = text.replace("\n", ", ")
 
-    return text.strip()
+def _play(audio_stream: "speechsdk.AudioDataStream") -> None:
+    """
+    Play a synthesis stream through a callback-driven output stream.
+    This thread only reads from the SDK into a queue; the audio callback drains it,
+    so stop_speaking() silences playback within one 20 ms device block.
+    """
+    chunks: "queue.SimpleQueue[Optional[bytes]]" = queue.SimpleQueue()
+    pending = bytearray()
+    ended = False
+    finished = threading.Event()
+
+    def callback(outdata, frames, time_info, status):
+        nonlocal ended
+        if _interrupt.is_set():
+            raise sd.CallbackAbort
+        need = len(outdata)
+        while len(pending) < need and not ended:
+            try:
+                chunk = chunks.get_nowait()
+            except queue.Empty:
+                break  # synthesis is behind playback: pad this block with silence
+            if chunk is None:
+                ended = True
+            else:
+                pending.extend(chunk)
+        n = min(need, len(pending))
+        outdata[:n] = pending[:n]
+        del pending[:n]
+        if n < need:
+            outdata[n:] = bytes(need - n)
+            if ended:
+                raise sd.CallbackStop
+
+    with sd.RawOutputStream(
+        samplerate=SAMPLE_RATE,
+        channels=1,
+        dtype="int16",
+        blocksize=_BLOCK_FRAMES,
+        callback=callback,
+        finished_callback=finished.set,
+    ):
+        buf = bytearray(_CHUNK_BYTES)
+        while not _interrupt.is_set() and (filled := audio_stream.read_data(buf)) > 0:
+            chunks.put(bytes(buf[:filled]))
+        chunks.put(None)
+        finished.wait()
+
+
+def _speak(spoken_text: str) -> None:
+    """Synthesize on the shared synthesizer and play the audio as it streams in."""
+    global _synthesizer
+    synthesizer = _get_synthesizer()
+    if _interrupt.is_set():
+        return  # interrupted before it started
+
+    # Returns once synthesis has started; the rest streams in while we play
+    result = synthesizer.start_speaking_text_async(spoken_text).get()
+    if result.reason == speechsdk.ResultReason.Canceled:
+        print("TTS failed:", result.cancellation_details.reason)
+        _synthesizer = None  # reconnect on the next utterance
+        return
+
+    audio_stream = speechsdk.AudioDataStream(result)
+    _play(audio_stream)
+
+    if _interrupt.is_set():
+        synthesizer.stop_speaking_async().get()  # discard the rest of the utterance
+        return
+
+    if audio_stream.status == speechsdk.StreamStatus.Canceled:
+        print("TTS failed:", audio_stream.cancellation_details.reason)
+        _synthesizer = None  # reconnect on the next utterance
 
 
 def speak_text(text: str) -> None:
     """
     Synthesize and speak text using Azure Speech SDK.
+    Audio is played as it streams in, so playback starts after the first chunk
+    rather than after the whole utterance is synthesized.
     
     Args:
         text: Text to speak (will be cleaned automatically)
     """
     spoken_text = prepare_text_for_speech(text)
 
-    # 1) Create temp WAV
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-        wav_path = tmp.name
-
-    # 2) Synthesize to WAV file
-    audio_cfg = speechsdk.audio.AudioOutputConfig(filename=wav_path)
-    synthesizer = speechsdk.SpeechSynthesizer(speech_config, audio_cfg)
-    result = synthesizer.speak_text_async(spoken_text).get()
+    with _synthesizer_lock:
+        _speak(spoken_text)
 
-    if result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
-        print("TTS failed:", result.reason)
-        return
 
-    # 3) Ensure file is done
-    time.sleep(0.05)
+def warmup() -> None:
+    """Create the shared synthesizer and open its connection before the first answer."""
+    with _synthesizer_lock:
+        _get_synthesizer()
 
-    # 4) Load the file safely
-    data, samplerate = sf.read(wav_path)
 
-    # 5) Play via sounddevice
-    sd.play(data, samplerate)
-    sd.wait()
+def stop_speaking() -> None:
+    """
+    Interrupt the utterance currently playing, if any (safe to call from any thread).
+    Playback goes silent at the next audio block; synthesis is then stopped.
+    Speech stays muted until resume_speaking() is called for the next turn.
+    """
+    _interrupt.set()
 
-    # Cleanup
-    os.remove(wav_path)
 
+def resume_speaking() -> None:
+    """Allow speech again after stop_speaking() (call when a new turn's answer is about to play)."""
+    _interrupt.clear()
@@ -3,50 +3,44 @@ Text-to-Speech Service (OpenAI)
 Handles text-to-speech synthesis using OpenAI TTS via Azure OpenAI.
 """
 import os
-import tempfile
-from typing import Optional
 from dotenv import load_dotenv
 from openai import AzureOpenAI
 import sounddevice as sd
-import soundfile as sf
 
 load_dotenv()
 
 # OpenAI TTS Client
 tts_client = AzureOpenAI(api_version=os.environ["AZURE_OPENAI_API_VERSION"])
 
+# response_format="pcm" is raw 24 kHz 16-bit mono little-endian
+PCM_SAMPLE_RATE = 24000
+_CHUNK_BYTES = PCM_SAMPLE_RATE * 2 // 10  # ~100 ms per device write
 
-def speak_text(text: str) -> Optional[str]:
+
+def speak_text(text: str) -> None:
     """
     Synthesize and speak text using OpenAI TTS (Azure OpenAI).
+    Raw PCM is played as it streams in: no temp file and no float decode.
     
     Args:
         text: Text to speak
-        
-    Returns:
-        Path to temporary WAV file (or None if failed)
     """
-    # Request streaming WAV audio
+    # Request streaming raw PCM (24 kHz, 16-bit, mono)
     response = tts_client.audio.speech.with_streaming_response.create(
         model=os.getenv("TTS_MODEL"),
         voice="onyx",  # Can choose other voices: alloy (serious female), onyx,(serious male), verse (cheerful male), nova (cheerful female), shimmer (serious female)
         input=text,
-        response_format="wav",
+        response_format="pcm",
     )
 
-    # Save streamed bytes
-    temp = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-
     # IMPORTANT: Use context manager correctly
-    with response as stream:
-        with open(temp.name, "wb") as f:
-            for chunk in stream.iter_bytes():
-                f.write(chunk)
-
-    # Load WAV and play
-    audio_data, samplerate = sf.read(temp.name)
-    sd.play(audio_data, samplerate)
-    sd.wait()
-
-    return temp.name
-
+    with response as stream, sd.RawOutputStream(samplerate=PCM_SAMPLE_RATE, channels=1, dtype="int16") as out:
+        carry = b""
+        for chunk in stream.iter_bytes(_CHUNK_BYTES):
+            # Network chunks can split a sample; only whole int16 samples go to the device
+            if carry:
+                chunk = carry + chunk
+            usable = len(chunk) & ~1
+            carry = chunk[usable:]
+            if usable:
+                out.write(chunk[:usable])
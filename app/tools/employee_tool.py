@@ -2,22 +2,27 @@
 Employee Data SQL Tool
 LangChain tool for querying employee database.
 """
-from langchain_core.tools import tool
-from app.repositories.employee_repository import EMPLOYEE_DB_PATH, run_employee_sql
+from langchain_core.tools import StructuredTool
+from app.repositories.employee_repository import run_employee_sql, arun_employee_sql
 from app.models.employee_schema import Employee_Schema_Description
 
 
-@tool
-def employee_data_sql_tool(sql_query: str) -> str:
-    """
-    Execute a read-only SQL query against the employee data (SQLite).
-    Only SELECT statements are allowed. Table name: employees
-    Schema is injected at runtime.
-    """
-    return run_employee_sql(sql_query, db_path=EMPLOYEE_DB_PATH)
+def _employee_data_sql(sql_query: str) -> str:
+    """Run the query synchronously (used by tool.invoke)."""
+    return run_employee_sql(sql_query)
+
+
+async def _aemployee_data_sql(sql_query: str) -> str:
+    """Run the query on the shared aiosqlite connection (used by tool.ainvoke)."""
+    return await arun_employee_sql(sql_query)
+
 
 # Inject schema description into tool
-employee_data_sql_tool.description = f"""
+employee_data_sql_tool = StructuredTool.from_function(
+    func=_employee_data_sql,
+    coroutine=_aemployee_data_sql,
+    name="employee_data_sql_tool",
+    description=f"""
 Execute a read-only SQL query against the employee data (SQLite).
 - Only SELECT statements are allowed.
 - Table name: employees
@@ -25,4 +30,5 @@ Execute a read-only SQL query against the employee data (SQLite).
 
 Schema:
 {Employee_Schema_Description}
-"""
\ No newline at end of file
+""",
+)
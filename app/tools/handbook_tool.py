@@ -2,23 +2,39 @@
 Handbook Retrieval Tool
 LangChain tool for searching the employee handbook vectorstore.
 """
+from cachetools import LRUCache
 from langchain_core.tools import tool
-from app.repositories.handbook_repository import retriever
+from app.repositories.handbook_repository import asearch_handbook
+
+# Formatted results for recent queries, keyed by the case/whitespace-normalized query.
+# The index only changes via an offline rebuild + restart, so entries never expire.
+_results_cache: "LRUCache[str, str]" = LRUCache(maxsize=256)
 
 
 @tool
-def handbook_retriever_tool(query: str) -> str:
+async def handbook_retriever_tool(query: str) -> str:
     """
     Search the Employee Handbook for policies, procedures, definitions, entitlements, and rules.
     Returns the top relevant sections.
     """
-    docs = retriever.invoke(query)
+    # Repeat questions (incl. STT casing/spacing variants) skip embedding and search entirely
+    normalized = " ".join(query.lower().split())
+    result = _results_cache.get(normalized)
+    if result is not None:
+        return result
 
-    if not docs:
-        return "No relevant information found in the employee handbook."
+    # Async retrieval (cached for near-duplicate queries), keeping the event loop free.
+    # The normalized text is only the cache key; the original query is what gets embedded.
+    docs = await asearch_handbook(query)
 
-    results = []
-    for i, doc in enumerate(docs):
-        results.append(f"Document {i+1}:\n{doc.page_content}")
+    if not docs:
+        result = "No relevant information found in the employee handbook."
+    else:
+        # One f-string per doc, one join sized in a single pass (a generator gains nothing:
+        # str.join materializes it into a list first)
+        result = "\n\n".join([
+            f"Document {i}:\n{doc.page_content}" for i, doc in enumerate(docs, 1)
+        ])
 
-    return "\n\n".join(results)
\ No newline at end of file
+    _results_cache[normalized] = result
+    return result
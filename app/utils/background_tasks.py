@@ -0,0 +1,18 @@
+"""
+Background Tasks
+Fire-and-forget scheduling for work that should not delay the HTTP response.
+"""
+import asyncio
+from typing import Any, Coroutine, Set
+
+# Strong references to in-flight tasks; the event loop only keeps weak ones,
+# so un-referenced tasks can be garbage collected before they finish.
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def run_in_background(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """Schedule a coroutine on the running loop without awaiting it."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
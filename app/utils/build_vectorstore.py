@@ -1,10 +1,12 @@
 from dotenv import load_dotenv
+import hashlib
 import os
 import re
-from typing import List
-from langchain_chroma import Chroma
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+import chromadb
 from langchain_openai import AzureOpenAIEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
+import pypdfium2 as pdfium
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from app.config.settings import PDF_PATH, VECTORSTORE_PERSIST_DIRECTORY, VECTORSTORE_COLLECTION_NAME, EMBEDDING_MODEL
@@ -22,59 +24,96 @@ print(pdf_path)
 if not os.path.exists(pdf_path):
     raise FileNotFoundError(f"PDF not found: {pdf_path}")
 
-pdf_loader = PyPDFLoader(pdf_path)
-pages = pdf_loader.load()
-print(f"[RAG] Loaded PDF ({len(pages)} pages)")
+# PDFium (native) text extraction; pages are read lazily one at a time.
+# PDFium is not thread-safe, so extraction stays on a single thread.
+pdf = pdfium.PdfDocument(pdf_path)
+print(f"[RAG] Loaded PDF ({len(pdf)} pages)")
+
+
+def iter_page_texts(document: pdfium.PdfDocument) -> Iterator[str]:
+    """Yield the text of each page, releasing native page handles as we go."""
+    for i in range(len(document)):
+        page = document[i]
+        textpage = page.get_textpage()
+        try:
+            yield textpage.get_text_range()
+        finally:
+            textpage.close()
+            page.close()
 
 # 2. Header detection
-# Combine pages into single text for header detection
-full_text = "\n".join([p.page_content for p in pages])
+# One anchored regex per line: "<num> <title>" where num is "N" (section) or "N.N" (subsection)
+_HEADER_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s+([A-Za-z].*?)\s*$")
+
+
+def _is_top_level_title(title: str) -> bool:
+    """Top-level headers are all-caps titles, optionally followed by a page number."""
+    title = title.rstrip("0123456789")
+    letters = "".join(title.split())
+    return len(letters) > 1 and letters.isalpha() and letters.isupper()
 
-TOP_LEVEL_RE = re.compile(r"^\s*\d+\s+[A-Z][A-Z\s]+(?:\d+)?\s*$")
-SUB_LEVEL_RE = re.compile(r"^\s*\d+\.\d+\s+[A-Za-z].+")
 
-def split_with_headers(text: str) -> List[Document]:
-    """Split PDF text into documents with section + subsection metadata."""
-    lines = text.splitlines()
-    docs: List[Document] = []
+def _canonical_header(m: re.Match) -> str:
+    """Canonical "<num> <title>" form with internal whitespace collapsed."""
+    return f"{m.group(1)} {' '.join(m.group(2).split())}"
+
+
+def split_with_headers_stream(lines: Iterable[str]) -> Iterator[Document]:
+    """
+    Split PDF text lines into documents with section + subsection metadata.
+    Streams: yields each Document as soon as its section ends, so only the
+    current section's lines are held in memory.
+    """
+    # Header matches are kept as-is; their canonical form is only built on flush
     current_section = None
     current_subsection = None
     buffer_lines = []
 
-    def flush():
+    def flush() -> Optional[Document]:
+        doc = None
         if buffer_lines:
             content = "\n".join(buffer_lines).strip()
             if content:
                 metadata = {}
                 if current_section:
-                    metadata["section"] = current_section
+                    metadata["section"] = _canonical_header(current_section)
                 if current_subsection:
-                    metadata["subsection"] = current_subsection
-                docs.append(Document(page_content=content, metadata=metadata))
+                    metadata["subsection"] = _canonical_header(current_subsection)
+                doc = Document(page_content=content, metadata=metadata)
         buffer_lines.clear()
+        return doc
 
     for line in lines:
-        stripped = line.strip()
-
-        if TOP_LEVEL_RE.match(stripped):
-            flush()
-            current_section = " ".join(stripped.split())
-            current_subsection = None
-            buffer_lines.append(stripped)
-            continue
-
-        if SUB_LEVEL_RE.match(stripped):
-            flush()
-            current_subsection = " ".join(stripped.split())
-            buffer_lines.append(stripped)
-            continue
+        m = _HEADER_RE.match(line)
+        if m:
+            if "." in m.group(1):
+                doc = flush()
+                if doc:
+                    yield doc
+                current_subsection = m
+                buffer_lines.append(line)
+                continue
+
+            if _is_top_level_title(m.group(2)):
+                doc = flush()
+                if doc:
+                    yield doc
+                current_section = m
+                current_subsection = None
+                buffer_lines.append(line)
+                continue
 
         buffer_lines.append(line)
 
-    flush()
-    return docs
+    doc = flush()
+    if doc:
+        yield doc
 
-header_docs = split_with_headers(full_text)
+# Feed page lines lazily; the splitter needs a list, so materialize only the header docs
+header_docs = list(split_with_headers_stream(
+    line for text in iter_page_texts(pdf) for line in text.splitlines()
+))
+pdf.close()
 print(f"[RAG] Header-aligned documents: {len(header_docs)}")
 
 # 3. Chunking
@@ -83,20 +122,66 @@ text_splitter = RecursiveCharacterTextSplitter(
     chunk_overlap=200,
     separators=["\n\n", "\n", " ", ""]
 )
+# Drop repeated boilerplate sections (TOC echoes, page headers) before chunking/embedding
+seen_hashes = set()
+unique_header_docs = []
+for doc in header_docs:
+    digest = hashlib.blake2b(doc.page_content.encode("utf-8"), digest_size=16).digest()
+    if digest in seen_hashes:
+        continue
+    seen_hashes.add(digest)
+    unique_header_docs.append(doc)
+print(f"[RAG] Dropped {len(header_docs) - len(unique_header_docs)} duplicate header documents")
+header_docs = unique_header_docs
+
 chunks = text_splitter.split_documents(header_docs)
 print(f"[RAG] Total chunks created: {len(chunks)}")
 
 # 4. Embedding + Vector Store
+# Embed in large batches concurrently, then write the precomputed vectors straight
+# into the Chroma collection so nothing is re-embedded on insert.
+EMBED_BATCH_SIZE = 512
+EMBED_MAX_WORKERS = 8
+CHROMA_ADD_BATCH_SIZE = 250
+CHROMA_ADD_MAX_WORKERS = 4
+
 embeddings = AzureOpenAIEmbeddings(model=EMBEDDING_MODEL)
 
+# Deterministic content-hash ids make re-runs idempotent (upsert); identical chunks collapse to one
+unique_chunks = {}
+for c in chunks:
+    chunk_id = hashlib.blake2b(c.page_content.encode("utf-8"), digest_size=16).hexdigest()
+    unique_chunks.setdefault(chunk_id, c)
+
+ids = list(unique_chunks)
+texts = [c.page_content for c in unique_chunks.values()]
+# Chroma rejects empty metadata dicts, so always record the source PDF
+metadatas = [{"source": pdf_path, **c.metadata} for c in unique_chunks.values()]
+
+text_batches = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+with ThreadPoolExecutor(max_workers=EMBED_MAX_WORKERS) as executor:
+    vectors = [vec for batch in executor.map(embeddings.embed_documents, text_batches) for vec in batch]
+print(f"[RAG] Embedded {len(vectors)} chunks in {len(text_batches)} batches")
+
 if not os.path.exists(persist_directory):
     os.makedirs(persist_directory)
 
-Chroma.from_documents(
-    documents=chunks,
-    embedding=embeddings,
-    persist_directory=persist_directory,
-    collection_name=collection_name,
-)
-
-print("Vectorstore built successfully.")
\ No newline at end of file
+client = chromadb.PersistentClient(path=persist_directory)
+collection = client.get_or_create_collection(name=collection_name)
+
+# Pipeline the writes: several batches in flight instead of one growing add call
+with ThreadPoolExecutor(max_workers=CHROMA_ADD_MAX_WORKERS) as executor:
+    futures = []
+    for i in range(0, len(texts), CHROMA_ADD_BATCH_SIZE):
+        batch = slice(i, i + CHROMA_ADD_BATCH_SIZE)
+        futures.append(executor.submit(
+            collection.upsert,
+            ids=ids[batch],
+            embeddings=vectors[batch],
+            documents=texts[batch],
+            metadatas=metadatas[batch],
+        ))
+    for future in futures:
+        future.result()  # surface any write errors
+
+print("Vectorstore built successfully.")
@@ -0,0 +1,19 @@
+"""
+Shared HTTP Clients
+One pooled HTTP/2 client reused by every Azure OpenAI client in the API process,
+so the agent, intent classifier, summarizer and embeddings share warm TLS
+connections (and multiplex parallel calls over them) instead of each opening its own pool.
+"""
+import httpx
+
+# Async client for langchain_openai's `http_async_client`.
+# Request timeouts are still set per call by the OpenAI SDK.
+shared_async_http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+)
+
+
+async def close_http_clients() -> None:
+    """Close the shared clients (called on application shutdown)."""
+    await shared_async_http_client.aclose()
@@ -1,8 +1,18 @@
-# Load prompt from file
+import os
+from functools import lru_cache
+
+
 def load_prompt(path: str) -> str:
     """Load a text prompt from a file."""
+    # Normalize first so relative and absolute spellings of a path share one cache entry
+    return _load_prompt(os.path.abspath(path))
+
+
+# Load prompt from file (cached: prompt files don't change at runtime)
+@lru_cache(maxsize=32)
+def _load_prompt(path: str) -> str:
     try:
         with open(path, "r", encoding="utf-8") as f:
             return f.read()
-    except:        
-        raise FileNotFoundError(f"Prompt not found. Tried: {path}")
\ No newline at end of file
+    except OSError:
+        raise FileNotFoundError(f"Prompt not found. Tried: {path}")
@@ -2,9 +2,8 @@
 Voice Loop Utility
 Main loop for voice-based interaction using OpenAI STT/TTS.
 """
-import os
 import uuid
-import requests
+import httpx
 from dotenv import load_dotenv
 import time
 
@@ -15,12 +14,14 @@ load_dotenv()
 
 RAG_API_URL = "http://localhost:8000/ask"
 SESSION_ID = str(uuid.uuid4())  # persistent conversation
+# One keep-alive client for the whole run (HTTP/2 when the server offers it over TLS)
+client = httpx.Client(http2=True, timeout=20)
 
 
 def ask_rag(question: str) -> str:
     """Send question to your FastAPI RAG server."""
     payload = {"session_id": SESSION_ID, "question": question}
-    resp = requests.post(RAG_API_URL, json=payload)
+    resp = client.post(RAG_API_URL, json=payload)
     return resp.json().get("answer", "(no answer)")
 
 
@@ -29,9 +30,8 @@ def voice_loop():
     while True:
         print("\n🎤 Speak now…")
         start_time = time.time()
-        wav_file = record_hot_mic()  # Hot mic listening
-        text = transcribe_audio(wav_file)  # Azure GPT-4o-mini transcription
-        os.remove(wav_file)
+        wav_audio = record_hot_mic()  # Hot mic listening (in-memory WAV)
+        text = transcribe_audio(wav_audio)  # Azure GPT-4o-mini transcription
 
         if not text.strip():
             print("❗ No speech detected.")
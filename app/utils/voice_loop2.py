@@ -2,23 +2,30 @@
 Voice Loop Utility (Azure Speech SDK)
 Main loop for voice-based interaction using Azure Speech SDK STT/TTS.
 """
+import os
 import uuid
 import time
-import requests
-from app.services.stt_service_azure import transcribe_from_mic
-from app.services.tts_service_azure import speak_text
+import queue
+import threading
+import httpx
+from app.services.stt_service_azure import transcribe_from_mic, warmup as warmup_stt
+from app.services.tts_service_azure import speak_text, stop_speaking, resume_speaking, warmup as warmup_tts
 
 # RAG server URL (ensure this matches your server)
 RAG_API_URL = "http://localhost:8000/ask"
-session = requests.Session()
+# One keep-alive client for the whole run (HTTP/2 when the server offers it over TLS)
+client = httpx.Client(http2=True, timeout=20)
 SESSION_ID = str(uuid.uuid4())  # keep same session id for the run (memory preserved)
+# Pipelined mode: keep listening while the answer plays, and cut it off when the
+# user speaks. Needs a headset (or echo cancellation), otherwise the mic hears the answer.
+VOICE_BARGE_IN = os.getenv("VOICE_BARGE_IN", "false").lower() == "true"
 
 
 def ask_rag(question: str) -> str:
     """Send question to your FastAPI RAG server."""
     payload = {"session_id": SESSION_ID, "question": question}
     try:
-        resp = session.post(RAG_API_URL, json=payload, timeout=20)
+        resp = client.post(RAG_API_URL, json=payload)
         resp.raise_for_status()
         return resp.json().get("answer", "(no answer)")
     except Exception as e:
@@ -26,9 +33,23 @@ def ask_rag(question: str) -> str:
         return "(error contacting RAG service)"
 
 
+def warmup():
+    """Open the Speech service connections (and the RAG connection) before the first turn."""
+    for warm in (warmup_stt, warmup_tts):
+        try:
+            warm()
+        except Exception as e:
+            print("Warmup failed:", e)
+    try:
+        client.get(RAG_API_URL.rsplit("/", 1)[0] + "/")
+    except Exception as e:
+        print("RAG server not reachable yet:", e)
+
+
 def main_loop():
     print("=== HR Voice Assistant (Azure STT + TTS) ===")
     print("Press Ctrl+C to quit.\n")
+    warmup()
 
     while True:
         try:
@@ -66,6 +87,92 @@ def main_loop():
             time.sleep(1)
 
 
+def _drain(q: queue.Queue) -> None:
+    """Drop anything still waiting in a queue."""
+    try:
+        while True:
+            q.get_nowait()
+    except queue.Empty:
+        pass
+
+
+def _run_forever(worker):
+    """Keep a pipeline stage alive across unexpected errors."""
+    while True:
+        try:
+            worker()
+        except Exception as e:
+            print("Runtime error in voice loop:", e)
+            time.sleep(1)
+
+
+def pipelined_loop():
+    """
+    STT, RAG and TTS as separate threads joined by small queues, so the next
+    question is captured while the current answer is still being spoken.
+    A new utterance interrupts the answer that is playing (barge-in).
+    Each question and answer carries its turn number; an answer to anything
+    but the latest turn (queued, in flight or about to play) is dropped.
+    """
+    print("=== HR Voice Assistant (Azure STT + TTS, barge-in) ===")
+    print("Press Ctrl+C to quit.\n")
+    warmup()
+
+    # Small bounded queues: a stage that falls behind blocks the one feeding it
+    questions: "queue.Queue[tuple[int, str]]" = queue.Queue(maxsize=2)
+    answers: "queue.Queue[tuple[int, str]]" = queue.Queue(maxsize=2)
+    current_turn = 0  # only written by stt_worker
+
+    def stt_worker():
+        nonlocal current_turn
+        while True:
+            text = transcribe_from_mic(timeout_seconds=8)
+            if not text:
+                continue
+            # The user talked over the assistant: every earlier answer is now stale.
+            # Bump the turn before stopping, so tts_worker can't resume a stale answer.
+            current_turn += 1
+            stop_speaking()
+            _drain(answers)
+            print(f"\nYou said: {text}")
+            questions.put((current_turn, text))
+
+    def rag_worker():
+        while True:
+            turn, question = questions.get()
+            if turn != current_turn:
+                continue  # superseded while queued
+            start_time = time.time()
+            answer = ask_rag(question)
+            if turn != current_turn:
+                continue  # superseded while the RAG call was in flight
+            print(f"\nAssistant: {answer}\n")
+            print(f"Elapsed time: {time.time() - start_time:.4f} seconds")
+            answers.put((turn, answer))
+
+    def tts_worker():
+        while True:
+            turn, answer = answers.get()
+            # Unmute for this turn, then re-check: a barge-in after this point
+            # sets the interrupt again and cuts the answer off
+            resume_speaking()
+            if turn != current_turn:
+                continue
+            speak_text(answer)
+
+    for worker in (stt_worker, rag_worker, tts_worker):
+        threading.Thread(target=_run_forever, args=(worker,), daemon=True).start()
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nExiting voice loop.")
+
+
 if __name__ == "__main__":
-    main_loop()
+    if VOICE_BARGE_IN:
+        pipelined_loop()
+    else:
+        main_loop()
 
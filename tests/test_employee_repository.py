@@ -0,0 +1,50 @@
+"""
+Employee repository tests (read-only SQL guard).
+Run from the repo root: python -m pytest tests
+"""
+import os
+import tempfile
+
+# The repository builds its DB at import time, so point it at the bundled CSV and a scratch DB first
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("ENV", "dev")
+os.environ.setdefault("CSV_PATH", os.path.join(_ROOT, "data", "employee_data.csv"))
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(), "employee_data.db"))
+
+from app.repositories.employee_repository import _check_read_only, run_employee_sql  # noqa: E402
+
+_REJECTED = "Only a single, complete SELECT statement is allowed."
+
+
+def test_trailing_line_comment_is_allowed():
+    sql = "SELECT department, COUNT(*) FROM employees GROUP BY department -- per dept"
+    assert _check_read_only(sql) is None
+    assert run_employee_sql(sql).startswith("department | COUNT(*)")
+
+
+def test_semicolon_inside_string_literal_is_allowed():
+    sql = "SELECT COUNT(*) FROM employees WHERE full_name LIKE '%;%'"
+    assert _check_read_only(sql) is None
+    assert run_employee_sql(sql).startswith("COUNT(*)")
+
+
+def test_unterminated_literal_is_rejected():
+    assert _check_read_only("SELECT * FROM employees WHERE full_name = 'abc") == _REJECTED
+
+
+def test_stacked_statements_are_not_executed():
+    assert run_employee_sql("SELECT 1; SELECT 2").startswith("SQL execution error")
+
+
+def test_self_join_keeps_column_names():
+    sql = (
+        "SELECT e.full_name, m.full_name FROM employees e "
+        "JOIN employees m ON m.department = e.department LIMIT 1"
+    )
+    assert run_employee_sql(sql).startswith("full_name | full_name\n")
+
+
+def test_row_limit_is_applied():
+    sql = "SELECT full_name FROM employees ORDER BY full_name"
+    assert run_employee_sql(sql, row_limit=3).count("\n") == 4  # header, separator, 3 rows
+    assert run_employee_sql(sql + " LIMIT 10", row_limit=3).count("\n") == 4
@@ -0,0 +1,37 @@
+"""
+RAG service tests (prefetched handbook round-trip).
+Run from the repo root: python -m pytest tests
+"""
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+# Importing the service builds the agent, LLM clients and vectorstore; none of them
+# are called here, so placeholder settings are enough
+pytest.importorskip("langgraph")
+pytest.importorskip("langchain_openai")
+pytest.importorskip("langchain_chroma")
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("ENV", "dev")
+os.environ.setdefault("CSV_PATH", os.path.join(_ROOT, "data", "employee_data.csv"))
+os.environ.setdefault("DB_PATH", os.path.join(tempfile.mkdtemp(), "employee_data.db"))
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "test")
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+os.environ.setdefault("AZURE_OPENAI_API_VERSION", "2025-01-01-preview")
+os.environ.setdefault("VECTORSTORE_PERSIST_DIRECTORY", tempfile.mkdtemp())
+os.environ.setdefault("VECTORSTORE_COLLECTION_NAME", "test")
+
+from app.services.rag_service import _prefetched_handbook_messages  # noqa: E402
+
+
+async def _docs() -> str:
+    return "Document 1:\nAnnual leave is 14 days."
+
+
+def test_prefetch_tool_call_id_fits_openai_limit():
+    ai_message, tool_message = asyncio.run(_prefetched_handbook_messages(_docs(), "How much leave?"))
+    tool_call_id = ai_message.tool_calls[0]["id"]
+    assert len(tool_call_id) <= 40  # chat completions rejects longer tool_call ids
+    assert tool_message.tool_call_id == tool_call_id
@@ -0,0 +1,23 @@
+"""
+Azure TTS text preparation tests.
+Run from the repo root: python -m pytest tests
+"""
+import os
+
+import pytest
+
+pytest.importorskip("azure.cognitiveservices.speech")
+pytest.importorskip("sounddevice")
+# Only the text cleanup is exercised; nothing is synthesized
+os.environ.setdefault("AZURE_SPEECH_KEY", "test")
+os.environ.setdefault("AZURE_SPEECH_REGION", "southeastasia")
+
+from app.services.tts_service_azure import prepare_text_for_speech  # noqa: E402
+
+
+def test_plain_citation_is_spoken_as_see():
+    assert prepare_text_for_speech("(see: Section 3) text") == "See Section 3 text"
+
+
+def test_bold_citation_is_spoken_as_see():
+    assert prepare_text_for_speech("(**see:** Section 3) text") == "See Section 3 text"